@@ -10,3 +10,8 @@ admin.site.register(api_models.Comments)
 admin.site.register(api_models.Post)
 admin.site.register(api_models.Bookmark)
 admin.site.register(api_models.Notification)
+admin.site.register(api_models.AuthorStats)
+admin.site.register(api_models.Tag)
+admin.site.register(api_models.PostTag)
+admin.site.register(api_models.Job)
+admin.site.register(api_models.Upload)
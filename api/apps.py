@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        # Connect the cache invalidation, author stats, image variant, search
+        # index and user cache signals, register the token pruning job, and
+        # count queries on every new connection.
+        from api import authentication, cache, counters, images, search  # noqa: F401
+        from api import metrics, token_blacklist  # noqa: F401
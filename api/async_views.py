@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from api import cache as api_cache
+from api import models as api_models
+from api import pagination as api_pagination
+from api import serializer as api_serializer
+from api.query_plan import plan_queryset
+from api.routers import is_pinned
+from api.view_buffer import view_counter
+
+
+class AsyncReadView(View):
+    """
+    Base for read-only endpoints that run natively on the event loop under
+    ASGI, instead of a thread-pool hop per request through a sync DRF view.
+
+    Subclasses implement get_data(); responses go through the same tagged
+    response cache as the sync views. Django's cache backends have no native
+    async implementation (their a* methods just hop to a thread), so the
+    cache is called directly.
+    """
+
+    serializer_class = None
+    cache_tags = ()
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def to_cache_data(self, data):
+        return data
+
+    async def from_cache_data(self, data):
+        return data
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs["context"] = {"request": self.request, "view": self}
+        return self.serializer_class(*args, **kwargs)
+
+    def plan(self, queryset):
+        return plan_queryset(queryset, self.get_serializer())
+
+    async def get_data(self):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        # DRF's request gives serializers and paginators what they expect.
+        self.request = Request(request)
+
+        # Clients pinned to the primary skip the cache, as in the sync views.
+        tags = [] if is_pinned() else self.get_cache_tags()
+        if tags:
+            backend = api_cache.response_cache()
+            key = api_cache.response_cache_key(self.request, tags)
+            data = backend.get(key)
+            if data is not None:
+                return self.render(await self.from_cache_data(data))
+
+        try:
+            data = await self.get_data()
+        except (ObjectDoesNotExist, NotFound):
+            return JsonResponse({"detail": "Not found."}, status=404)
+
+        if tags:
+            backend.set(
+                key,
+                self.to_cache_data(data),
+                getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+            )
+        return self.render(data)
+
+    def render(self, data):
+        return JsonResponse(data, encoder=JSONEncoder, safe=False)
+
+
+class AsyncCategoryListView(AsyncReadView):
+    serializer_class = api_serializer.CategorySerializer
+    replica_reads = True
+    cache_tags = ["categories"]
+
+    async def get_data(self):
+        categories = await api_cache.acategory_list()
+        return self.get_serializer(categories, many=True).data
+
+
+class AsyncPostListView(AsyncReadView):
+    serializer_class = api_serializer.PostReadSerializer
+    replica_reads = True
+    cache_tags = ["post-pages", "posts"]
+
+    async def get_data(self):
+        paginator = api_pagination.PostCursorPagination()
+        posts = self.plan(api_models.Post.objects.all())
+        page = await paginator.apaginate_queryset(posts, self.request, self)
+        data = self.get_serializer(page, many=True).data
+        return paginator.get_paginated_response(data).data
+
+
+class AsyncPostDetailView(AsyncReadView):
+    serializer_class = api_serializer.PostReadSerializer
+    replica_reads = True
+
+    def get_cache_tags(self):
+        return ["post-pages", f"post:{self.kwargs['slug']}"]
+
+    def to_cache_data(self, data):
+        # Cache the persisted count; pending views are added back on each hit.
+        data = dict(data)
+        data["view"] -= view_counter.pending(data["id"])
+        return data
+
+    async def from_cache_data(self, data):
+        await view_counter.arecord(data["id"])
+        data["view"] += view_counter.pending(data["id"])
+        return data
+
+    async def get_data(self):
+        posts = self.plan(api_models.Post.objects.all())
+        post = await posts.aget(slug=self.kwargs["slug"], status="Active")
+        await view_counter.arecord(post.id)
+        post.view += view_counter.pending(post.id)
+        return self.get_serializer(post).data
+
+
+class AsyncNotificationListView(AsyncReadView):
+    serializer_class = api_serializer.NotificationReadSerializer
+
+    async def get_data(self):
+        user = await api_models.User.objects.aget(id=self.kwargs["user_id"])
+        notifications = self.plan(
+            api_models.Notification.objects.filter(seen=False, user=user)
+        )
+        notifications = [notification async for notification in notifications]
+        return self.get_serializer(notifications, many=True).data
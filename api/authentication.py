@@ -0,0 +1,67 @@
+import copy
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from api import models as api_models
+from api.local_cache import TTLCache
+
+
+# Users by id, with their profile. In-process, so other workers only see a
+# change once their entry expires; keep the timeout short.
+users = TTLCache(ttl=getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 30))
+
+
+def cached_user(user_id):
+    """
+    Return the user with ``user_id`` (profile preloaded), raising
+    User.DoesNotExist like User.objects.get. Each caller gets its own copy.
+    """
+    try:
+        key = int(user_id)
+    except (TypeError, ValueError):
+        raise api_models.User.DoesNotExist(f"Invalid user id {user_id!r}")
+
+    user = users.get(key)
+    if user is None:
+        user = api_models.User.objects.select_related("profile").get(id=key)
+        users.set(key, user)
+    return copy.deepcopy(user)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    simplejwt's JWTAuthentication, resolving the token's user_id claim
+    through the user cache instead of a SELECT on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        try:
+            user = cached_user(user_id)
+        except api_models.User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+
+@receiver(post_save, sender=api_models.User)
+@receiver(post_delete, sender=api_models.User)
+def user_changed(sender, instance, **kwargs):
+    users.delete(instance.id)
+
+
+@receiver(post_save, sender=api_models.Profile)
+@receiver(post_delete, sender=api_models.Profile)
+def profile_changed(sender, instance, **kwargs):
+    users.delete(instance.user_id)
@@ -0,0 +1,64 @@
+from django.db.backends.sqlite3 import base
+
+from api.sqlite import is_write, write_gate
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite with the production profile from api.sqlite: tuned PRAGMAs on
+    connect, and writers serialized through an in-process WriteGate.
+
+    Transactions start with BEGIN IMMEDIATE, so a transaction that reads
+    before it writes can't fail upgrading its lock; it waits at the gate
+    (and, across processes, on busy_timeout) instead.
+
+    The catch is that every outermost atomic() takes the gate, including
+    ones that only read: they queue behind writers. Taking it at the first
+    write instead would bring back the failed upgrades. Every atomic() in
+    this app writes, and plain reads run in autocommit without the gate.
+    `manage.py stress_sqlite_writes` reports what read-only transactions
+    pay under write load: p95 of about 8 ms at 8 writer threads, against
+    0.2-4 ms with the stock backend.
+    """
+
+    production_profile = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate = write_gate(self.settings_dict["NAME"])
+        self.execute_wrappers.append(self._gate_autocommit_writes)
+
+    def _start_transaction_under_autocommit(self):
+        self.gate.acquire(self)
+        try:
+            self.cursor().execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.gate.release(self)
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.gate.release(self)
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.gate.release(self)
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.gate.release(self)
+
+    def _gate_autocommit_writes(self, execute, sql, params, many, context):
+        if self.in_atomic_block or self.gate.holder is self or not is_write(sql):
+            return execute(sql, params, many, context)
+        self.gate.acquire(self)
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.gate.release(self)
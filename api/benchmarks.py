@@ -0,0 +1,312 @@
+import contextlib
+import gc
+import math
+import statistics
+import time
+
+import shortuuid
+from django.conf import settings
+from django.db import connections
+
+from api import models as api_models
+from api import uploads as api_uploads
+from api.token_blacklist import RefreshToken
+
+# Allowed regressions against the baseline, per endpoint: relative growth of
+# p95 latency (ignored below latency_floor_ms), extra queries, relative
+# growth of the response body.
+THRESHOLDS = {
+    "latency": 0.25,
+    "latency_floor_ms": 5.0,
+    "queries": 0,
+    "bytes": 0.10,
+}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def thresholds(**overrides):
+    values = {**THRESHOLDS, **getattr(settings, "BENCHMARK_THRESHOLDS", {})}
+    values.update({key: value for key, value in overrides.items() if value is not None})
+    return values
+
+
+class Endpoint:
+    """
+    One request to time. ``data`` may be a callable taking the iteration
+    number, for requests that can't repeat the same payload.
+    """
+
+    def __init__(self, name, method, path, data=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+
+    def request(self, client, i):
+        data = self.data(i) if callable(self.data) else self.data
+        if self.method == "get":
+            return client.get(self.path, data)
+        send = getattr(client, self.method)
+        return send(self.path, data or {}, content_type="application/json")
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def endpoints(password):
+    """
+    Every public and dashboard endpoint, pointed at the busiest rows of a
+    seeded database: the most liked post, its author, category and tag.
+    """
+    post = (
+        api_models.Post.objects.filter(status="Active")
+        .exclude(category=None)
+        .order_by("-likes_count", "id")
+        .first()
+    )
+    if post is None:
+        raise BenchmarkError("Benchmarks need a seeded database; run seed_blog first")
+
+    author = post.user
+    reader = api_models.User.objects.exclude(id=author.id).order_by("id").first()
+    tag = api_models.Tag.objects.filter(posttag__post=post).order_by("id").first()
+    notification = api_models.Notification.objects.filter(user=author).last()
+    comment = api_models.Comments.objects.filter(post__user=author).last()
+    upload = api_uploads.start(author, "bench.png", "image/png", 1024)
+    if None in (reader, tag, notification, comment):
+        raise BenchmarkError("Seeded database has no interactions to benchmark")
+
+    # Refresh tokens rotate, so every request needs a fresh one.
+    refresh_tokens = []
+
+    def refresh(i):
+        if not refresh_tokens:
+            refresh_tokens.extend(str(RefreshToken.for_user(reader)) for _ in range(50))
+        return {"refresh": refresh_tokens.pop()}
+
+    run = shortuuid.uuid()[:6].lower()
+
+    def register(i):
+        email = f"bench{i}@{run}.bench.example"
+        return {
+            "full_name": "Bench User",
+            "email": email,
+            "password": "Bench-Pass-4821",
+            "password2": "Bench-Pass-4821",
+        }
+
+    edit = {
+        "title": post.title,
+        "description": post.description,
+        "tags": post.tags,
+        "category": post.category_id,
+        "post_status": post.status,
+        "image": "undefined",
+    }
+    create = {**edit, "user_id": author.id, "image": None}
+    dashboard = "/api/v1/author/dashboard"
+
+    return [
+        # Public reads
+        Endpoint("category list", "get", "/api/v1/post/category/list/"),
+        Endpoint(
+            "category posts",
+            "get",
+            f"/api/v1/post/category/posts/{post.category.slug}/",
+        ),
+        Endpoint("post list", "get", "/api/v1/post/list/"),
+        Endpoint(
+            "post search",
+            "get",
+            "/api/v1/post/search/",
+            {"q": post.title.split()[0]},
+        ),
+        Endpoint("tag posts", "get", f"/api/v1/post/tag/{tag.slug}/"),
+        Endpoint("tag cloud", "get", "/api/v1/post/tag-cloud/"),
+        Endpoint("post detail", "get", f"/api/v1/post/details/{post.slug}/"),
+        Endpoint("profile", "get", f"/api/v1/user/profile/{reader.id}/"),
+        Endpoint("async category list", "get", "/api/v1/async/post/category/list/"),
+        Endpoint("async post list", "get", "/api/v1/async/post/list/"),
+        Endpoint(
+            "async post detail", "get", f"/api/v1/async/post/details/{post.slug}/"
+        ),
+        # Dashboard reads
+        Endpoint("dashboard stats", "get", f"{dashboard}/stats/{author.id}/"),
+        Endpoint("dashboard comments", "get", f"{dashboard}/comment-list/{author.id}/"),
+        Endpoint(
+            "dashboard notifications", "get", f"{dashboard}/noti-list/{author.id}/"
+        ),
+        Endpoint(
+            "async dashboard notifications",
+            "get",
+            f"/api/v1/async/author/dashboard/noti-list/{author.id}/",
+        ),
+        Endpoint(
+            "dashboard unread count",
+            "get",
+            f"{dashboard}/noti-unread-count/{author.id}/",
+        ),
+        Endpoint(
+            "dashboard post detail",
+            "get",
+            f"{dashboard}/post-detail/{author.id}/{post.id}/",
+        ),
+        Endpoint(
+            "dashboard upload status", "get", f"{dashboard}/upload/{upload.handle}/"
+        ),
+        # Auth
+        Endpoint(
+            "token",
+            "post",
+            "/api/v1/user/token/",
+            {"email": reader.email, "password": password},
+        ),
+        Endpoint("token refresh", "post", "/api/v1/user/token/refresh/", refresh),
+        Endpoint("register", "post", "/api/v1/user/register/", register),
+        # Writes; likes and bookmarks toggle on and off.
+        Endpoint(
+            "like",
+            "post",
+            "/api/v1/post/like-post/",
+            {"user_id": reader.id, "post_id": post.id},
+        ),
+        Endpoint(
+            "bookmark",
+            "post",
+            "/api/v1/post/bookmark-post/",
+            {"user_id": reader.id, "post_id": post.id},
+        ),
+        Endpoint(
+            "comment",
+            "post",
+            "/api/v1/post/comment-post/",
+            {
+                "post_id": post.id,
+                "name": reader.full_name,
+                "email": reader.email,
+                "comment": "Benchmark comment",
+            },
+        ),
+        Endpoint(
+            "dashboard reply",
+            "post",
+            f"{dashboard}/reply-comment/",
+            {"comment_id": comment.id, "reply": "Benchmark reply"},
+        ),
+        Endpoint(
+            "dashboard mark seen",
+            "post",
+            f"{dashboard}/noti-mark-seen/",
+            {"noti_id": notification.id},
+        ),
+        Endpoint(
+            "dashboard mark seen bulk",
+            "post",
+            f"{dashboard}/noti-mark-seen-bulk/",
+            {"user_id": author.id, "up_to_id": notification.id},
+        ),
+        Endpoint(
+            "dashboard upload start",
+            "post",
+            f"{dashboard}/upload/",
+            {
+                "user_id": author.id,
+                "filename": "bench.png",
+                "content_type": "image/png",
+                "size": 1024,
+            },
+        ),
+        Endpoint("dashboard post create", "post", f"{dashboard}/post-create/,", create),
+        Endpoint(
+            "dashboard post edit",
+            "put",
+            f"{dashboard}/post-detail/{author.id}/{post.id}/",
+            edit,
+        ),
+    ]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+def measure(client, endpoint, requests):
+    """
+    Latency percentiles, the usual query count (the higher one when toggles
+    alternate) and the largest response.
+    """
+    counter = QueryCounter()
+    latencies, queries, size = [], [], 0
+
+    # The first request warms up connections, caches and query plans.
+    for i in range(requests + 1):
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            # Collect between requests, not during them, to steady the tail.
+            gc.collect()
+            gc.disable()
+            stack.callback(gc.enable)
+            counter.count = 0
+            start = time.perf_counter()
+            response = endpoint.request(client, i)
+            elapsed = time.perf_counter() - start
+
+        if response.status_code >= 400:
+            raise BenchmarkError(
+                f"{endpoint.name}: {endpoint.method.upper()} {endpoint.path} "
+                f"returned {response.status_code}"
+            )
+        if i:
+            latencies.append(elapsed)
+            queries.append(counter.count)
+            size = max(size, len(response.content))
+
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "queries": max(statistics.multimode(queries)),
+        "bytes": size,
+    }
+
+
+def run(client, requests, password):
+    return {
+        endpoint.name: measure(client, endpoint, requests)
+        for endpoint in endpoints(password)
+    }
+
+
+def compare(baseline, results, limits):
+    """Describe every endpoint that regressed past the limits."""
+    regressions = []
+    for name, after in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+
+        slower = after["p95_ms"] - before["p95_ms"]
+        if (
+            after["p95_ms"] > before["p95_ms"] * (1 + limits["latency"])
+            and slower > limits["latency_floor_ms"]
+        ):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']:.1f} -> {after['p95_ms']:.1f} ms"
+            )
+        if after["queries"] > before["queries"] + limits["queries"]:
+            regressions.append(
+                f"{name}: queries {before['queries']} -> {after['queries']}"
+            )
+        if after["bytes"] > before["bytes"] * (1 + limits["bytes"]):
+            regressions.append(f"{name}: bytes {before['bytes']} -> {after['bytes']}")
+    return regressions
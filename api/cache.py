@@ -0,0 +1,220 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+from api import models as api_models
+from api.routers import is_pinned
+
+CATEGORY_LIST_KEY = "api:category-list"
+
+
+def _categories():
+    return api_models.Category.objects.annotate(
+        post_count=Count("post", filter=Q(post__status="Active"))
+    ).order_by("id")
+
+
+def category_list():
+    """All categories annotated with their active post count, cached."""
+    categories = cache.get(CATEGORY_LIST_KEY)
+    if categories is None:
+        categories = list(_categories())
+        cache.set(
+            CATEGORY_LIST_KEY,
+            categories,
+            getattr(settings, "CATEGORY_LIST_CACHE_TIMEOUT", 300),
+        )
+    return categories
+
+
+async def acategory_list():
+    categories = cache.get(CATEGORY_LIST_KEY)
+    if categories is None:
+        categories = [category async for category in _categories()]
+        cache.set(
+            CATEGORY_LIST_KEY,
+            categories,
+            getattr(settings, "CATEGORY_LIST_CACHE_TIMEOUT", 300),
+        )
+    return categories
+
+
+def invalidate_category_list():
+    # After commit, like bump_tags(), so a reader can't re-cache the old rows.
+    transaction.on_commit(lambda: cache.delete(CATEGORY_LIST_KEY))
+    bump_tags("categories")
+
+
+# Response cache
+#
+# Every cached response is filed under a set of tags ("posts",
+# "post:<slug>", "category:<slug>", ...). Each tag has a version number
+# stored in the cache, and the versions are part of the response key, so
+# bumping a tag's version orphans exactly the responses that depend on it.
+
+
+def response_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _tag_key(tag):
+    return f"api:tag:{tag}"
+
+
+def tag_versions(tags):
+    backend = response_cache()
+    keys = [_tag_key(tag) for tag in tags]
+    versions = backend.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock, never from 0, so an evicted version can't
+            # bring back responses cached under an earlier one.
+            backend.add(key, time.time_ns(), None)
+            versions[key] = backend.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_tags(*tags):
+    def bump():
+        backend = response_cache()
+        for tag in tags:
+            try:
+                backend.incr(_tag_key(tag))
+            except ValueError:
+                backend.set(_tag_key(tag), time.time_ns(), None)
+
+    # Readers must not re-cache the old rows under the new version.
+    transaction.on_commit(bump)
+
+
+def response_cache_key(request, tags):
+    versions = tag_versions(tags)
+    raw = "|".join([request.build_absolute_uri(), *map(str, tags), *map(str, versions)])
+    return "api:response:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    Serves GET requests from the response cache, keyed by the full URL and
+    the current versions of the view's cache tags. Requests pinned to the
+    primary (see api.routers) bypass it.
+    """
+
+    cache_tags = ()
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def to_cache_data(self, data):
+        return data
+
+    def from_cache_data(self, data):
+        return data
+
+    def get(self, request, *args, **kwargs):
+        if is_pinned():
+            # The client just wrote and a cached page may predate the write.
+            return super().get(request, *args, **kwargs)
+
+        backend = response_cache()
+        key = response_cache_key(request, self.get_cache_tags())
+
+        data = backend.get(key)
+        if data is not None:
+            return Response(self.from_cache_data(data))
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            backend.set(
+                key,
+                self.to_cache_data(response.data),
+                getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+            )
+        return response
+
+
+def invalidate_posts(posts):
+    """Bump the tags of every page that renders any of ``posts``."""
+    tags = {"posts"}
+    category_ids = set()
+    for post in posts:
+        loaded = getattr(post, "_loaded_values", None) or {}
+        for slug in {post.slug, loaded.get("slug")}:
+            if slug is not None:
+                tags.add(f"post:{slug}")
+        category_ids.update({post.category_id, loaded.get("category_id")})
+
+    category_ids.discard(None)
+    if category_ids:
+        slugs = api_models.Category.objects.filter(id__in=category_ids).values_list(
+            "slug", flat=True
+        )
+        tags.update(f"category:{slug}" for slug in slugs)
+
+    bump_tags(*tags)
+
+
+def invalidate_post_ids(post_ids):
+    invalidate_posts(
+        api_models.Post.objects.filter(id__in=post_ids).only("slug", "category_id")
+    )
+
+
+@receiver(post_save, sender=api_models.Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created or instance.has_changed("category_id", "status"):
+        invalidate_category_list()
+    invalidate_posts([instance])
+
+
+@receiver(post_delete, sender=api_models.Post)
+def post_deleted(sender, instance, **kwargs):
+    invalidate_category_list()
+    invalidate_posts([instance])
+
+
+@receiver(post_save, sender=api_models.Category)
+@receiver(post_delete, sender=api_models.Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_category_list()
+    # Categories are nested into every post page.
+    bump_tags("post-pages")
+
+
+@receiver(post_save, sender=api_models.User)
+@receiver(post_delete, sender=api_models.User)
+@receiver(post_save, sender=api_models.Profile)
+@receiver(post_delete, sender=api_models.Profile)
+def author_changed(sender, instance, created=False, **kwargs):
+    # Authors and likers are nested into post pages. A new user isn't
+    # on any page yet.
+    if not created:
+        bump_tags("post-pages")
+
+
+@receiver(post_save, sender=api_models.Comments)
+@receiver(post_delete, sender=api_models.Comments)
+@receiver(post_save, sender=api_models.Bookmark)
+@receiver(post_delete, sender=api_models.Bookmark)
+def post_interaction_changed(sender, instance, **kwargs):
+    invalidate_post_ids([instance.post_id])
+
+
+@receiver(m2m_changed, sender=api_models.Post.likes.through)
+def post_likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_posts([instance])
+    elif pk_set:
+        invalidate_post_ids(pk_set)
+    else:
+        # user.likes_user.clear() doesn't say which posts were affected.
+        bump_tags("post-pages")
@@ -0,0 +1,176 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from api import models as api_models
+
+# Counter column on Post -> the rows it summarises.
+POST_COUNTERS = {
+    "likes_count": api_models.Post.likes.through,
+    "comments_count": api_models.Comments,
+    "bookmarks_count": api_models.Bookmark,
+}
+
+AUTHOR_STATS_FIELDS = ["views", "posts", "likes", "bookmarks", "unread_notifications"]
+
+
+def _grouped(queryset, group_by, aggregate):
+    rows = (
+        queryset.order_by().values(group_by).annotate(total=aggregate).values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def adjust_post_counter(post_id, counter, delta):
+    """Apply a +/- delta to one counter column in a single UPDATE."""
+    return api_models.Post.objects.filter(id=post_id).update(
+        **{counter: Greatest(F(counter) + delta, 0)}
+    )
+
+
+def actual_counts():
+    """Subquery expressions computing each counter from the source rows."""
+    return {
+        counter: _grouped(model.objects.filter(post=OuterRef("pk")), "post", Count("*"))
+        for counter, model in POST_COUNTERS.items()
+    }
+
+
+def rebuild_post_counters(queryset=None):
+    if queryset is None:
+        queryset = api_models.Post.objects.all()
+    return queryset.update(**actual_counts())
+
+
+def find_counter_drift(queryset=None):
+    """Posts whose stored counters disagree with the source rows."""
+    if queryset is None:
+        queryset = api_models.Post.objects.all()
+
+    expressions = actual_counts()
+    annotated = queryset.annotate(
+        **{f"actual_{counter}": expr for counter, expr in expressions.items()}
+    )
+    drift = Q()
+    for counter in expressions:
+        drift |= ~Q(**{counter: F(f"actual_{counter}")})
+
+    fields = ["id", *expressions, *(f"actual_{c}" for c in expressions)]
+    return annotated.filter(drift).values(*fields)
+
+
+def actual_author_stats():
+    """Subquery expressions computing AuthorStats columns per User."""
+    posts = api_models.Post.objects.filter(user=OuterRef("pk"))
+    return {
+        "views": _grouped(posts, "user", Sum("view")),
+        "posts": _grouped(posts, "user", Count("*")),
+        "likes": _grouped(
+            api_models.Post.likes.through.objects.filter(post__user=OuterRef("pk")),
+            "post__user",
+            Count("*"),
+        ),
+        "bookmarks": _grouped(
+            api_models.Bookmark.objects.filter(post__user=OuterRef("pk")),
+            "post__user",
+            Count("*"),
+        ),
+        "unread_notifications": _grouped(
+            api_models.Notification.objects.filter(user=OuterRef("pk"), seen=False),
+            "user",
+            Count("*"),
+        ),
+    }
+
+
+def recompute_author_stats(user_ids=None):
+    """Rebuild AuthorStats rows from scratch with one upsert."""
+    users = api_models.User.objects.all()
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+    else:
+        users = users.filter(
+            Q(post__isnull=False) | Q(authorstats__isnull=False)
+        ).distinct()
+
+    rows = [
+        api_models.AuthorStats(user_id=row.pop("id"), **row)
+        for row in users.annotate(**actual_author_stats()).values(
+            "id", *AUTHOR_STATS_FIELDS
+        )
+    ]
+    return api_models.AuthorStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=AUTHOR_STATS_FIELDS,
+    )
+
+
+def adjust_author_stats(user_id, **deltas):
+    """
+    Apply +/- deltas to an author's stats row. Must run after the source
+    rows have changed, because a missing row is recomputed from them.
+    Rows are created with the user and backfilled by migration 0014, so
+    the recompute only runs for users inserted without signals.
+    """
+    updated = api_models.AuthorStats.objects.filter(user_id=user_id).update(
+        **{field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+    )
+    if not updated:
+        recompute_author_stats([user_id])
+
+
+def find_author_stats_drift():
+    """AuthorStats rows that disagree with the source rows."""
+    # AuthorStats is keyed on the user, so OuterRef("pk") is the user id here.
+    expressions = actual_author_stats()
+    annotated = api_models.AuthorStats.objects.annotate(
+        **{f"actual_{field}": expr for field, expr in expressions.items()}
+    )
+    drift = Q()
+    for field in AUTHOR_STATS_FIELDS:
+        drift |= ~Q(**{field: F(f"actual_{field}")})
+
+    fields = ["user_id", *AUTHOR_STATS_FIELDS]
+    fields += [f"actual_{field}" for field in AUTHOR_STATS_FIELDS]
+    return annotated.filter(drift).values(*fields)
+
+
+# Posts are counted here rather than in the views, so posts created or
+# deleted through the admin or the ORM keep the stats in step too.
+@receiver(post_save, sender=api_models.Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_author_stats(instance.user_id, posts=1, views=instance.view)
+
+
+@receiver(pre_delete, sender=api_models.Post)
+def post_deleting(sender, instance, **kwargs):
+    # The post's notifications are deleted before post_delete is sent.
+    instance._unread_notifications = list(
+        api_models.Notification.objects.filter(post=instance, seen=False)
+        .order_by()
+        .values("user")
+        .annotate(unread=Count("*"))
+        .values_list("user", "unread")
+    )
+
+
+@receiver(post_delete, sender=api_models.Post)
+def post_deleted(sender, instance, origin=None, **kwargs):
+    # A deleted user's stats row goes with them.
+    gone = origin.pk if isinstance(origin, api_models.User) else None
+
+    if instance.user_id != gone:
+        adjust_author_stats(
+            instance.user_id,
+            posts=-1,
+            views=-instance.view,
+            likes=-instance.likes_count,
+            bookmarks=-instance.bookmarks_count,
+        )
+    for user_id, unread in getattr(instance, "_unread_notifications", []):
+        if user_id != gone:
+            adjust_author_stats(user_id, unread_notifications=-unread)
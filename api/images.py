@@ -0,0 +1,134 @@
+import hashlib
+import io
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from rest_framework import serializers
+
+from api import cache as api_cache
+from api import jobs
+from api import models as api_models
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional; without it uploads are served as-is.
+    Image = None
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MODELS = [api_models.Post, api_models.Profile, api_models.Category]
+
+
+def variant_formats():
+    formats = ["webp"]
+    # AVIF support arrived in Pillow 11.2; older versions warn on the name.
+    if "avif" in features.modules and features.check_module("avif"):
+        formats.append("avif")
+    return formats
+
+
+def _store(data, extension):
+    # Named after the content, so the URL can be cached forever.
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    name = f"image/variants/{digest}.{extension}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def build_variants(source):
+    """
+    Encode ``source`` (an open image file) at each configured width, plus
+    full size, in every supported modern format. Returns {key: storage name}.
+    """
+    widths = getattr(settings, "IMAGE_VARIANT_WIDTHS", [320, 768])
+    quality = getattr(settings, "IMAGE_VARIANT_QUALITY", 80)
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        sizes = {"full": image}
+        for width in widths:
+            if width < image.width:
+                height = round(image.height * width / image.width)
+                sizes[f"{width}w"] = image.resize((width, height), Image.LANCZOS)
+
+        variants = {}
+        for label, resized in sizes.items():
+            for extension in variant_formats():
+                buffer = io.BytesIO()
+                resized.save(buffer, format=extension.upper(), quality=quality)
+                variants[f"{label}.{extension}"] = _store(buffer.getvalue(), extension)
+    return variants
+
+
+@jobs.task("build_image_variants")
+def build_image_variants_task(model, pk, image):
+    Model = apps.get_model(model)
+    instance = Model.objects.filter(pk=pk).only("image").first()
+    if instance is None or instance.image.name != image:
+        # Deleted, or replaced by a newer upload with its own job.
+        return
+    if not default_storage.exists(image):
+        logger.warning("%s %s points at missing image %s", model, pk, image)
+        return
+
+    with instance.image.open("rb") as source:
+        variants = build_variants(source)
+    if Model.objects.filter(pk=pk, image=image).update(image_variants=variants):
+        _invalidate(Model, pk)
+
+
+def _invalidate(Model, pk):
+    # The update above bypasses post_save, so clear cached pages by hand.
+    if Model is api_models.Post:
+        api_cache.invalidate_post_ids([pk])
+    else:
+        if Model is api_models.Category:
+            api_cache.invalidate_category_list()
+        api_cache.bump_tags("post-pages")
+
+
+def image_saved(sender, instance, created, **kwargs):
+    if not instance.has_changed("image"):
+        return
+
+    name = instance.image.name if instance.image else ""
+    default = sender._meta.get_field("image").default
+    if name == default and not instance.image_variants:
+        # Shared placeholder (e.g. default-user.jpg); nothing new to encode.
+        return
+
+    if name and Image is not None:
+        jobs.enqueue(
+            "build_image_variants",
+            model=sender._meta.label,
+            pk=instance.pk,
+            image=name,
+        )
+    elif instance.image_variants:
+        sender.objects.filter(pk=instance.pk).update(image_variants={})
+        _invalidate(sender, instance.pk)
+
+
+for model in IMAGE_MODELS:
+    post_save.connect(image_saved, sender=model, dispatch_uid=f"image_saved:{model}")
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Renders stored variant names as absolute media URLs."""
+
+    def to_representation(self, variants):
+        request = self.context.get("request")
+        urls = {}
+        for key, name in (variants or {}).items():
+            url = default_storage.url(name)
+            urls[key] = request.build_absolute_uri(url) if request else url
+        return urls
@@ -0,0 +1,161 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api import models as api_models
+from api.notifications import notify
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register a function as a job handler under ``name``."""
+
+    def register(func):
+        TASKS[name] = func
+        return func
+
+    return register
+
+
+def enqueue(name, delay=0, max_attempts=5, **payload):
+    """
+    Queue ``name`` to run with ``payload`` as keyword arguments. Inside a
+    transaction the job only becomes visible to workers once it commits.
+    """
+    if name not in TASKS:
+        raise KeyError(f"Unknown job {name!r}")
+
+    if getattr(settings, "JOBS_RUN_EAGERLY", False):
+        transaction.on_commit(lambda: TASKS[name](**payload))
+        return None
+
+    return api_models.Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim(worker_id):
+    """
+    Atomically take the next due job for ``worker_id``, or return None.
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED where the database has it. On
+    SQLite, which doesn't, each candidate is claimed with a conditional
+    UPDATE, so two workers can never both move the same row to Running.
+    """
+    now = timezone.now()
+    due = api_models.Job.objects.filter(status="Pending", run_at__lte=now).order_by(
+        "run_at", "id"
+    )
+    claimed = {"status": "Running", "locked_by": worker_id, "locked_at": now}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = due.select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            api_models.Job.objects.filter(id=job.id).update(**claimed)
+            return job
+
+    for job_id in due.values_list("id", flat=True)[:10]:
+        if api_models.Job.objects.filter(id=job_id, status="Pending").update(**claimed):
+            return api_models.Job.objects.get(id=job_id)
+    return None
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts``, with jitter."""
+    base = getattr(settings, "JOBS_RETRY_BACKOFF", 5)
+    delay = min(base * 2 ** (attempts - 1), 3600)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run(job):
+    """Run a claimed job and record the outcome."""
+    jobs = api_models.Job.objects.filter(id=job.id)
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        attempts = job.attempts + 1
+        error = traceback.format_exc()
+        logger.exception("Job %s (%s) failed on attempt %s", job.id, job.name, attempts)
+
+        if attempts >= job.max_attempts:
+            jobs.update(status="Failed", attempts=attempts, last_error=error)
+        else:
+            jobs.update(
+                status="Pending",
+                attempts=attempts,
+                last_error=error,
+                locked_by=None,
+                locked_at=None,
+                run_at=timezone.now() + timedelta(seconds=backoff(attempts)),
+            )
+        return False
+
+    # Finished jobs hold nothing worth keeping; failed ones stay for
+    # inspection until prune_failed() removes them.
+    jobs.delete()
+    return True
+
+
+def release_stale(timeout=None):
+    """Put jobs whose worker died mid-run back in the queue."""
+    if timeout is None:
+        timeout = getattr(settings, "JOBS_LOCK_TIMEOUT", 300)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return api_models.Job.objects.filter(status="Running", locked_at__lt=cutoff).update(
+        status="Pending", locked_by=None, locked_at=None
+    )
+
+
+def prune_failed(age=None):
+    """Delete jobs that failed for good more than ``age`` seconds ago."""
+    if age is None:
+        age = getattr(settings, "JOBS_FAILED_RETENTION", 7 * 24 * 3600)
+    cutoff = timezone.now() - timedelta(seconds=age)
+    deleted, _ = api_models.Job.objects.filter(
+        status="Failed", locked_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+# Handlers for side effects moved off the request path.
+
+
+@task("notify")
+def notify_task(user_id, post_id, type):
+    notify(user_id, post_id, type)
+
+
+@task("save_user_profile")
+def save_user_profile_task(user_id):
+    profile = api_models.Profile.objects.filter(user_id=user_id).first()
+    if profile is not None:
+        profile.save()
+
+
+@task("send_email")
+def send_email_task(subject, to, template, context):
+    from django.core.mail import EmailMultiAlternatives
+    from django.template.loader import render_to_string
+
+    html_body = render_to_string(template, context)
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=html_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=to if isinstance(to, list) else [to],
+    )
+    message.attach_alternative(html_body, "text/html")
+    message.send()
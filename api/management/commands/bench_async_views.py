@@ -0,0 +1,89 @@
+import asyncio
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+
+from api import models as api_models
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync DRF read views with their native async "
+        "versions under concurrent load, through Django's ASGI request path. "
+        "Runs against the configured database; post detail requests are "
+        "counted as views."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Keep the response cache on (by default every request hits the database).",
+        )
+
+    def handle(self, *args, **options):
+        post = api_models.Post.objects.filter(status="Active").first()
+        if post is None:
+            raise CommandError("Benchmark needs at least one active post")
+        user_id = (
+            api_models.Notification.objects.values_list("user_id", flat=True).first()
+            or post.user_id
+        )
+
+        endpoints = [
+            "post/category/list/",
+            "post/list/",
+            f"post/details/{post.slug}/",
+            f"author/dashboard/noti-list/{user_id}/",
+        ]
+
+        # Requests never leave the process, so accept the test client's host.
+        overrides = {"ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"]}
+        if not options["cached"]:
+            dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            overrides["CACHES"] = {"default": dummy}
+
+        with override_settings(**overrides):
+            for endpoint in endpoints:
+                for prefix in ["/api/v1/", "/api/v1/async/"]:
+                    url = prefix + endpoint
+                    result = asyncio.run(
+                        self.run(url, options["requests"], options["concurrency"])
+                    )
+                    self.stdout.write(
+                        f"{url:<60} {result['rps']:>8.1f} req/s  "
+                        f"p50 {result['p50']:>7.1f} ms  p95 {result['p95']:>7.1f} ms"
+                    )
+
+    async def run(self, url, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+
+        # Warm up connections, query plans and serializer fields.
+        await one()
+        latencies.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            "rps": requests / elapsed,
+            "p50": statistics.median(latencies) * 1000,
+            "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        }
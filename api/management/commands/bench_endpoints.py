@@ -0,0 +1,183 @@
+import io
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+
+from api import benchmarks
+from api.view_buffer import view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every public and dashboard endpoint through the Django test client "
+        "and record p50/p95 latency, query count and response bytes. By default "
+        "it seeds a throwaway test database with seed_blog, so runs are "
+        "comparable. Results are checked against a JSON baseline, and the "
+        "command fails if any endpoint regressed past the thresholds. The "
+        "committed benchmarks/baseline.json comes from a default run with "
+        "--save; latency depends on the machine, so record your own baseline "
+        "with --save before comparing on other hardware."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=30)
+        parser.add_argument(
+            "--baseline",
+            default=getattr(settings, "BENCHMARK_BASELINE", "benchmarks/baseline.json"),
+        )
+        parser.add_argument(
+            "--save",
+            action="store_true",
+            help="Store this run as the new baseline instead of comparing.",
+        )
+        parser.add_argument(
+            "--existing",
+            action="store_true",
+            help="Benchmark the configured database instead of a fresh seeded one.",
+        )
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Keep the response cache on (by default every request hits the database).",
+        )
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--interactions", type=int, default=50000)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password of the benchmarked user, for the token endpoint.",
+        )
+        parser.add_argument(
+            "--latency", type=float, help="Allowed p95 growth, e.g. 0.25."
+        )
+        parser.add_argument("--queries", type=int, help="Allowed extra queries.")
+        parser.add_argument("--bytes", type=float, help="Allowed response growth.")
+
+    def handle(self, *args, **options):
+        meta = {
+            "requests": options["requests"],
+            "cached": options["cached"],
+            "dataset": (
+                "existing"
+                if options["existing"]
+                else {
+                    key: options[key]
+                    for key in ["users", "posts", "interactions", "seed"]
+                }
+            ),
+        }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            uploads = os.path.join(tmp, "uploads")
+            overrides = {
+                # Requests never leave the process, so accept the test client's host.
+                "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+                "DEBUG": False,
+                "REST_FRAMEWORK": {
+                    **settings.REST_FRAMEWORK,
+                    "DEFAULT_THROTTLE_RATES": {},
+                },
+                "CHUNKED_UPLOAD_DIR": uploads,
+            }
+            if not options["cached"]:
+                dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+                overrides["CACHES"] = {"default": dummy}
+
+            with override_settings(**overrides):
+                if options["existing"]:
+                    results = self.run(options)
+                else:
+                    database = connections["default"]
+                    if database.vendor == "sqlite":
+                        # A file, unlike the shared in-memory test database,
+                        # lets the view count flush wait for a busy writer.
+                        test = database.settings_dict.setdefault("TEST", {})
+                        test["NAME"] = os.path.join(tmp, "bench.sqlite3")
+                    old_config = setup_databases(verbosity=0, interactive=False)
+                    try:
+                        self.seed(options)
+                        results = self.run(options)
+                    finally:
+                        # Buffered post views belong to the throwaway database.
+                        view_counter.flush()
+                        teardown_databases(old_config, verbosity=0)
+
+        baseline = self.load(options["baseline"])
+        previous = baseline["endpoints"] if baseline else {}
+        for name, result in results.items():
+            before = previous.get(name)
+            change = ""
+            if before:
+                change = (
+                    f"  (was {before['p95_ms']:.1f} ms, {before['queries']} queries)"
+                )
+            self.stdout.write(
+                f"{name:<32} p50 {result['p50_ms']:>8.1f} ms  "
+                f"p95 {result['p95_ms']:>8.1f} ms  {result['queries']:>4} queries  "
+                f"{result['bytes']:>9} bytes{change}"
+            )
+
+        if options["save"] or baseline is None:
+            self.save(options["baseline"], {"meta": meta, "endpoints": results})
+            self.stdout.write(
+                self.style.SUCCESS(f"Saved baseline to {options['baseline']}")
+            )
+            return
+
+        if baseline["meta"] != meta:
+            raise CommandError(
+                "The baseline was recorded with different options "
+                f"({baseline['meta']}); rerun with --save to replace it"
+            )
+
+        limits = benchmarks.thresholds(
+            latency=options["latency"],
+            queries=options["queries"],
+            bytes=options["bytes"],
+        )
+        regressions = benchmarks.compare(previous, results, limits)
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against the baseline")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def seed(self, options):
+        interactions = options["interactions"]
+        call_command(
+            "seed_blog",
+            users=options["users"],
+            posts=options["posts"],
+            likes=interactions // 2,
+            comments=interactions // 4,
+            bookmarks=interactions // 4,
+            seed=options["seed"],
+            stdout=io.StringIO(),
+        )
+
+    def run(self, options):
+        try:
+            return benchmarks.run(Client(), options["requests"], options["password"])
+        except benchmarks.BenchmarkError as e:
+            raise CommandError(str(e))
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path) as handle:
+            return json.load(handle)
+
+    def save(self, path, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as handle:
+            json.dump(data, handle, indent=2, sort_keys=True)
+            handle.write("\n")
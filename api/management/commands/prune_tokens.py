@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from api import jobs
+from api.token_blacklist import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired JWT refresh tokens from the outstanding and blacklist tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches (default: until none are left).",
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Queue the pruning as a background job instead of running it here.",
+        )
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            jobs.enqueue("prune_expired_tokens", batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS("Queued token pruning"))
+            return
+
+        deleted, remaining = prune_expired_tokens(
+            options["batch_size"], options["max_batches"]
+        )
+        message = f"Deleted {deleted} expired tokens"
+        if remaining:
+            message += "; more remain"
+        self.stdout.write(self.style.SUCCESS(message))
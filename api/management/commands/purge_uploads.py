@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.uploads import purge_stale
+
+
+class Command(BaseCommand):
+    help = "Delete chunked uploads, finished or not, that were started too long ago."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=24,
+            help="Age in hours after which an upload is considered abandoned.",
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_stale(options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} stale uploads"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.counters import find_author_stats_drift, recompute_author_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized AuthorStats rows from posts, likes and bookmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report authors whose stats have drifted; exit 1 if any.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(find_author_stats_drift())
+        for row in drifted:
+            self.stdout.write(
+                "User {user_id}: views {views}/{actual_views}, "
+                "posts {posts}/{actual_posts}, likes {likes}/{actual_likes}, "
+                "bookmarks {bookmarks}/{actual_bookmarks}, "
+                "unread {unread_notifications}/{actual_unread_notifications}".format(
+                    **row
+                )
+            )
+
+        if options["check"]:
+            if drifted:
+                raise CommandError(f"{len(drifted)} author(s) have drifted stats")
+            self.stdout.write(self.style.SUCCESS("All author stats are correct"))
+            return
+
+        rows = recompute_author_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt stats for {len(rows)} author(s), {len(drifted)} had drifted"
+            )
+        )
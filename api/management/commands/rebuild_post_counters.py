@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.counters import find_counter_drift, rebuild_post_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Post like/comment/bookmark counters from the source rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report posts whose counters have drifted; exit 1 if any.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(find_counter_drift())
+        for row in drifted:
+            self.stdout.write(
+                "Post {id}: likes {likes_count}/{actual_likes_count}, "
+                "comments {comments_count}/{actual_comments_count}, "
+                "bookmarks {bookmarks_count}/{actual_bookmarks_count}".format(**row)
+            )
+
+        if options["check"]:
+            if drifted:
+                raise CommandError(f"{len(drifted)} post(s) have drifted counters")
+            self.stdout.write(self.style.SUCCESS("All post counters are correct"))
+            return
+
+        updated = rebuild_post_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt counters for {updated} post(s), {len(drifted)} had drifted"
+            )
+        )
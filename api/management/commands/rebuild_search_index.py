@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import ensure_triggers, rebuild_index, search_available
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over post titles, descriptions and tags."
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError("Post search requires the SQLite database backend")
+
+        for name in ensure_triggers():
+            self.stdout.write(f"Re-created missing trigger {name}")
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
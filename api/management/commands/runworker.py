@@ -0,0 +1,82 @@
+import os
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker threads in this process. Several processes can also "
+            "run side by side; jobs are claimed atomically.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue has no due jobs left.",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(f"{prefix}:{n}", options["sleep"], options["once"]),
+                daemon=True,
+            )
+            for n in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+
+        self.stdout.write(f"Started {len(threads)} worker(s) as {prefix}")
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+    def work(self, worker_id, sleep, once):
+        try:
+            last_sweep = 0
+            while not self.stop.is_set():
+                close_old_connections()
+                if time.monotonic() - last_sweep > 60:
+                    jobs.release_stale()
+                    jobs.prune_failed()
+                    last_sweep = time.monotonic()
+
+                job = jobs.claim(worker_id)
+                if job is None:
+                    if once:
+                        return
+                    self.stop.wait(sleep)
+                    continue
+
+                if jobs.run(job):
+                    self.stdout.write(f"[{worker_id}] {job.name} #{job.id} done")
+                else:
+                    self.stderr.write(f"[{worker_id}] {job.name} #{job.id} failed")
+        finally:
+            connections.close_all()
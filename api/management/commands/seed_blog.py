@@ -0,0 +1,389 @@
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import shortuuid
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from api import cache as api_cache
+from api import models as api_models
+from api.counters import rebuild_post_counters, recompute_author_stats
+
+WORDS = (
+    "django python api cache query index async design testing deploy scaling "
+    "database latency profile travel food music history science health money "
+    "startup career remote writing reading garden coffee city weekend guide"
+).split()
+
+CATEGORIES = [
+    "Technology",
+    "Programming",
+    "Travel",
+    "Food",
+    "Lifestyle",
+    "Business",
+    "Health",
+    "Science",
+    "Culture",
+    "Sports",
+    "Music",
+    "Education",
+]
+
+STATUSES = ["Active"] * 18 + ["Draft", "Disabled"]
+
+# Rows built in memory before each bulk_create, to bound memory use.
+CHUNK = 50000
+
+
+class Zipf:
+    """
+    Draws items so that the item of popularity rank r comes up about
+    1 / r**exponent as often as the most popular one. Ranks are shuffled,
+    so popularity doesn't follow id or date order.
+    """
+
+    def __init__(self, rng, items, exponent):
+        self.rng = rng
+        self.items = rng.sample(list(items), len(items))
+        self.cum_weights = list(
+            itertools.accumulate(
+                1 / rank**exponent for rank in range(1, len(self.items) + 1)
+            )
+        )
+
+    def draw(self, k):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+    def share(self, rank):
+        """Expected fraction of draws that pick self.items[rank]."""
+        previous = self.cum_weights[rank - 1] if rank else 0
+        return (self.cum_weights[rank] - previous) / self.cum_weights[-1]
+
+
+@contextmanager
+def keep_dates(*models):
+    """Let bulk_create store the dates set on instances instead of now()."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, posts and interactions for load "
+        "testing. Rows go in with bulk_create, skipping per-row signals, and "
+        "popularity of posts and activity of users follow a Zipf distribution. "
+        "Likes and comments notify the post's author, coalesced per post and "
+        "type like the app does; bookmarks, as in the app, don't. Counters and "
+        "author stats are rebuilt at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument(
+            "--authors",
+            type=int,
+            default=None,
+            help="How many of the users write posts (default: a tenth).",
+        )
+        parser.add_argument("--categories", type=int, default=len(CATEGORIES))
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--likes", type=int, default=500000)
+        parser.add_argument("--comments", type=int, default=250000)
+        parser.add_argument("--bookmarks", type=int, default=250000)
+        parser.add_argument(
+            "--seen",
+            type=float,
+            default=0.7,
+            help="Fraction of notifications already seen.",
+        )
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.0,
+            help="Zipf exponent; higher means more skew towards popular rows.",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["posts"] < 1 or options["categories"] < 1:
+            raise CommandError("Need at least one user, category and post")
+
+        self.rng = random.Random(options["seed"])
+        self.options = options
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        # Keeps slugs and emails unique when seeding the same database twice.
+        self.run = shortuuid.uuid()[:6].lower()
+
+        start = time.monotonic()
+        dated = [
+            api_models.Post,
+            api_models.Comments,
+            api_models.Bookmark,
+            api_models.Notification,
+        ]
+        with keep_dates(*dated), transaction.atomic():
+            users = self.step("users", self.create_users)
+            authors = users[: options["authors"] or max(1, len(users) // 10)]
+            categories = self.step("categories", self.create_categories)
+            posts = self.step("posts", self.create_posts, authors, categories)
+            self.step("post tags", self.create_post_tags, posts)
+
+            self.user_activity = Zipf(self.rng, users, options["zipf"])
+            self.notifications = {}
+
+            likes = self.step("likes", self.create_likes)
+            comments = self.step("comments", self.create_comments)
+            bookmarks = self.step("bookmarks", self.create_bookmarks)
+            self.step("notifications", self.create_notifications)
+
+            self.step(
+                "counters",
+                rebuild_post_counters,
+                api_models.Post.objects.filter(id__range=(posts[0].id, posts[-1].id)),
+            )
+            self.step(
+                "author stats",
+                recompute_author_stats,
+                sorted({post.user_id for post in posts}),
+            )
+
+            # The inserts bypassed the signals that keep cached pages fresh.
+            api_cache.invalidate_category_list()
+            api_cache.bump_tags("post-pages", "posts")
+
+        interactions = likes + comments + bookmarks
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(users)} users, {len(posts)} posts and {interactions} "
+                f"interactions in {time.monotonic() - start:.1f}s (run {self.run})"
+            )
+        )
+
+    def step(self, label, function, *args):
+        start = time.monotonic()
+        result = function(*args)
+        count = len(result) if isinstance(result, list) else result
+        self.stdout.write(f"{label:<14} {count:>9} {time.monotonic() - start:>7.1f}s")
+        return result
+
+    def since(self, date):
+        """A random moment between date and now."""
+        return date + (self.now - date) * self.rng.random()
+
+    def words(self, low, high):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def create_users(self):
+        # Hashing once keeps this fast; every seeded user shares the password.
+        password = make_password(self.options["password"])
+        users = [
+            api_models.User(
+                username=f"{self.run}-user{i}",
+                email=f"user{i}@{self.run}.seed.example",
+                full_name=f"Seed User {i}",
+                password=password,
+                date_joined=self.now,
+            )
+            for i in range(self.options["users"])
+        ]
+        users = api_models.User.objects.bulk_create(users, batch_size=self.batch_size)
+
+        profiles = [
+            api_models.Profile(
+                user=user,
+                full_name=user.full_name,
+                bio=self.words(3, 8),
+                country=self.rng.choice(["US", "UK", "IN", "DE", "BR", "JP"]),
+            )
+            for user in users
+        ]
+        for profile in api_models.Profile.objects.bulk_create(
+            profiles, batch_size=self.batch_size
+        ):
+            profile.user.profile = profile
+        return users
+
+    def create_categories(self):
+        categories = [
+            api_models.Category(title=title, slug=f"{slugify(title)}-{self.run}-{i}")
+            for i, title in enumerate(
+                itertools.islice(
+                    itertools.cycle(CATEGORIES), self.options["categories"]
+                )
+            )
+        ]
+        return api_models.Category.objects.bulk_create(
+            categories, batch_size=self.batch_size
+        )
+
+    def create_posts(self, authors, categories):
+        # Prolific authors and big categories follow the same skew.
+        writers = Zipf(self.rng, authors, self.options["zipf"])
+        sections = Zipf(self.rng, categories, self.options["zipf"])
+
+        count = self.options["posts"]
+        oldest = self.now - timedelta(days=self.options["days"])
+        posts = []
+        for i, user, category in zip(
+            range(count), writers.draw(count), sections.draw(count)
+        ):
+            title = self.words(3, 7).capitalize()
+            posts.append(
+                api_models.Post(
+                    user=user,
+                    profile=user.profile,
+                    category=category,
+                    title=title,
+                    tags=", ".join(self.rng.sample(WORDS, self.rng.randint(1, 4))),
+                    description=self.words(15, 35),
+                    status=self.rng.choice(STATUSES),
+                    slug=f"{slugify(title)}-{self.run}-{i}",
+                    date=self.since(oldest),
+                )
+            )
+
+        # Interactions go to active posts; views follow the same popularity,
+        # roughly ten per interaction.
+        active = [post for post in posts if post.status == "Active"] or posts
+        self.post_popularity = Zipf(self.rng, active, self.options["zipf"])
+        views = 10 * self.interaction_count()
+        for rank, post in enumerate(self.post_popularity.items):
+            post.view = int(views * self.post_popularity.share(rank))
+            post.view += self.rng.randint(0, 20)
+
+        return api_models.Post.objects.bulk_create(posts, batch_size=self.batch_size)
+
+    def create_post_tags(self, posts):
+        names = {slugify(word): word for word in WORDS}
+        api_models.Tag.objects.bulk_create(
+            [api_models.Tag(slug=slug, name=name) for slug, name in names.items()],
+            ignore_conflicts=True,
+        )
+        tag_ids = dict(
+            api_models.Tag.objects.filter(slug__in=names).values_list("slug", "id")
+        )
+        rows = [
+            api_models.PostTag(post=post, tag_id=tag_ids[slugify(name.strip())])
+            for post in posts
+            for name in post.tags.split(",")
+        ]
+        return api_models.PostTag.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def interaction_count(self):
+        return sum(self.options[kind] for kind in ["likes", "comments", "bookmarks"])
+
+    def distinct_pairs(self, count):
+        """
+        Yield lists of (post, user) pairs, each pair at most once, until
+        count pairs exist or the popular posts have run out of new users.
+        """
+        seen = set()
+        stride = max(user.id for user in self.user_activity.items) + 1
+        stalls = 0
+        while len(seen) < count and stalls < 3:
+            k = min(CHUNK, count - len(seen))
+            batch = []
+            for post, user in zip(
+                self.post_popularity.draw(k), self.user_activity.draw(k)
+            ):
+                key = post.id * stride + user.id
+                if key not in seen:
+                    seen.add(key)
+                    batch.append((post, user))
+            stalls = stalls + 1 if len(batch) < k // 100 + 1 else 0
+            if batch:
+                yield batch
+
+    def notify(self, post, kind, date):
+        key = (post.user_id, post.id, kind)
+        count, latest = self.notifications.get(key, (0, date))
+        self.notifications[key] = (count + 1, max(latest, date))
+
+    def create_likes(self):
+        through = api_models.Post.likes.through
+        created = 0
+        for batch in self.distinct_pairs(self.options["likes"]):
+            rows = []
+            for post, user in batch:
+                rows.append(through(post_id=post.id, user_id=user.id))
+                self.notify(post, "Like", self.since(post.date))
+            through.objects.bulk_create(rows, batch_size=self.batch_size)
+            created += len(rows)
+        return created
+
+    def create_comments(self):
+        created = 0
+        remaining = self.options["comments"]
+        while remaining > 0:
+            k = min(CHUNK, remaining)
+            rows = []
+            for post, user in zip(
+                self.post_popularity.draw(k), self.user_activity.draw(k)
+            ):
+                date = self.since(post.date)
+                reply = self.words(4, 12) if self.rng.random() < 0.2 else None
+                rows.append(
+                    api_models.Comments(
+                        post=post,
+                        name=user.full_name,
+                        email=user.email,
+                        comment=self.words(5, 25),
+                        reply=reply,
+                        date=date,
+                    )
+                )
+                self.notify(post, "Comment", date)
+            api_models.Comments.objects.bulk_create(rows, batch_size=self.batch_size)
+            created += k
+            remaining -= k
+        return created
+
+    def create_bookmarks(self):
+        created = 0
+        for batch in self.distinct_pairs(self.options["bookmarks"]):
+            rows = []
+            for post, user in batch:
+                date = self.since(post.date)
+                rows.append(api_models.Bookmark(post=post, user=user, date=date))
+            api_models.Bookmark.objects.bulk_create(rows, batch_size=self.batch_size)
+            created += len(rows)
+        return created
+
+    def create_notifications(self):
+        seen = self.options["seen"]
+        rows = [
+            api_models.Notification(
+                user_id=user_id,
+                post_id=post_id,
+                type=kind,
+                count=count,
+                seen=self.rng.random() < seen,
+                date=date,
+            )
+            for (user_id, post_id, kind), (count, date) in self.notifications.items()
+        ]
+        return api_models.Notification.objects.bulk_create(
+            rows, batch_size=self.batch_size
+        )
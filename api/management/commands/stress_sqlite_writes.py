@@ -0,0 +1,179 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections, transaction
+
+ENGINES = {
+    "stock": "django.db.backends.sqlite3",
+    "production profile": "api.backends.sqlite3",
+}
+
+SCHEMA = [
+    "CREATE TABLE post (id INTEGER PRIMARY KEY, view INTEGER NOT NULL, likes INTEGER NOT NULL)",
+    "CREATE TABLE post_like (post_id INTEGER, user_id INTEGER, UNIQUE (post_id, user_id))",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a scratch SQLite file with concurrent like toggles and view "
+        "increments, once with Django's stock SQLite backend and once with the "
+        "production profile, and report how many writes failed. Reader threads "
+        "meanwhile run read-only transactions, which wait at the production "
+        "profile's write gate, to show what that costs them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--posts", type=int, default=5)
+        parser.add_argument(
+            "--readers",
+            type=int,
+            default=4,
+            help="Threads running read-only transactions alongside the writers.",
+        )
+
+    def handle(self, *args, **options):
+        for label, engine in ENGINES.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                alias = f"stress-{label}"
+                connections.settings[alias] = {
+                    **connections["default"].settings_dict,
+                    "ENGINE": engine,
+                    "NAME": os.path.join(tmp, "stress.sqlite3"),
+                    # Django's default wait, so the gate is the only difference.
+                    "OPTIONS": {"timeout": 5},
+                }
+                try:
+                    errors, elapsed, consistent, reads = self.run(alias, options)
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+            writes = options["threads"] * options["iterations"]
+            failed = sum(errors.values())
+            self.stdout.write(
+                f"{label:<20} {failed:>5}/{writes} writes failed "
+                f"({failed / writes:.1%}), {writes / elapsed:>7.0f} writes/s, "
+                f"counters {'consistent' if consistent else 'DRIFTED'}"
+            )
+            for message, count in errors.most_common():
+                self.stdout.write(f"    {count:>5} x {message}")
+            if reads:
+                p95 = statistics.quantiles(reads, n=20)[-1] if len(reads) > 1 else 0
+                self.stdout.write(
+                    f"{'':<20} {len(reads):>5} read-only transactions, "
+                    f"p50 {statistics.median(reads) * 1000:.2f} ms, "
+                    f"p95 {p95 * 1000:.2f} ms"
+                )
+
+    def run(self, alias, options):
+        with connections[alias].cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.executemany(
+                "INSERT INTO post (id, view, likes) VALUES (%s, 0, 0)",
+                [(i,) for i in range(options["posts"])],
+            )
+
+        errors = Counter()
+        reads = []
+        lock = threading.Lock()
+        start = threading.Barrier(options["threads"] + options["readers"])
+        writing = threading.Event()
+        writing.set()
+
+        def worker(user_id):
+            start.wait()
+            try:
+                for i in range(options["iterations"]):
+                    post_id = i % options["posts"]
+                    try:
+                        if i % 2:
+                            self.view(alias, post_id)
+                        else:
+                            self.toggle_like(alias, post_id, user_id)
+                    except DatabaseError as e:
+                        with lock:
+                            errors[str(e)] += 1
+            finally:
+                connections[alias].close()
+
+        def reader():
+            start.wait()
+            try:
+                while writing.is_set():
+                    began = time.perf_counter()
+                    try:
+                        self.read(alias)
+                    except DatabaseError as e:
+                        with lock:
+                            errors[f"read: {e}"] += 1
+                        continue
+                    with lock:
+                        reads.append(time.perf_counter() - began)
+            finally:
+                connections[alias].close()
+
+        threads = [
+            threading.Thread(target=worker, args=(user_id,))
+            for user_id in range(options["threads"])
+        ]
+        readers = [threading.Thread(target=reader) for _ in range(options["readers"])]
+        began = time.perf_counter()
+        for thread in threads + readers:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+        writing.clear()
+        for thread in readers:
+            thread.join()
+
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM post WHERE likes != "
+                "(SELECT COUNT(*) FROM post_like WHERE post_like.post_id = post.id)"
+            )
+            consistent = cursor.fetchone()[0] == 0
+        return errors, elapsed, consistent, reads
+
+    def view(self, alias, post_id):
+        # Same shape as the view counter flush: one autocommit UPDATE.
+        with connections[alias].cursor() as cursor:
+            cursor.execute("UPDATE post SET view = view + 1 WHERE id = %s", [post_id])
+
+    def read(self, alias):
+        # A transaction that only reads, e.g. a consistent multi-query page.
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute("SELECT SUM(view), SUM(likes) FROM post")
+            cursor.fetchone()
+
+    def toggle_like(self, alias, post_id, user_id):
+        # Same shape as LikePostAPIView: read, then write, in one transaction.
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM post_like WHERE post_id = %s AND user_id = %s",
+                [post_id, user_id],
+            )
+            if cursor.fetchone():
+                cursor.execute(
+                    "DELETE FROM post_like WHERE post_id = %s AND user_id = %s",
+                    [post_id, user_id],
+                )
+                delta = -1
+            else:
+                cursor.execute(
+                    "INSERT INTO post_like (post_id, user_id) VALUES (%s, %s)",
+                    [post_id, user_id],
+                )
+                delta = 1
+            cursor.execute(
+                "UPDATE post SET likes = likes + %s WHERE id = %s", [delta, post_id]
+            )
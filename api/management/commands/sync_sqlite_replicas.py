@@ -0,0 +1,28 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database into each configured read replica."
+
+    def handle(self, *args, **options):
+        primary = connections["default"]
+        if primary.vendor != "sqlite":
+            raise CommandError("Replica sync only applies to SQLite databases")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured; set DATABASE_REPLICAS")
+
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            # Replicas are opened read-only through a file: URI; write the file.
+            path = settings.DATABASES[alias]["NAME"].removeprefix("file:")
+            path = path.split("?")[0]
+            target = sqlite3.connect(path)
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"Synced {alias} ({path})"))
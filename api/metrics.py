@@ -0,0 +1,353 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Per-request query counter, visible from sync_to_async threads too.
+_queries = ContextVar("metrics_queries", default=None)
+
+
+def latency_buckets():
+    return getattr(settings, "METRICS_LATENCY_BUCKETS", LATENCY_BUCKETS)
+
+
+class Registry:
+    """
+    Request stats for this process. Every thread records into its own shard,
+    so recording never waits on a lock; a scrape sums the shards.
+
+    Each series, keyed by (view, method, status), is a flat list:
+    [requests, seconds, queries, db seconds, bytes, *latency buckets,
+    *size buckets], which makes merging shards or processes a plain sum.
+    """
+
+    FIELDS = 5
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._shards_lock = threading.Lock()
+        self._timer = None
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._retire_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead_shards(self):
+        # Servers that start a thread per request would otherwise leave a
+        # shard behind for each one. A dead thread's shard can't change.
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._retired = merge([self._retired, shard])
+        self._shards = live
+
+    def record(self, view, method, status, seconds, queries, db_seconds, size):
+        latency, sizes = latency_buckets(), SIZE_BUCKETS
+        shard = self._shard()
+        key = (view, method, str(status))
+        series = shard.get(key)
+        if series is None:
+            series = shard[key] = [0] * (self.FIELDS + len(latency) + len(sizes))
+
+        series[0] += 1
+        series[1] += seconds
+        series[2] += queries
+        series[3] += db_seconds
+        series[4] += size
+        for i, bound in enumerate(latency):
+            if seconds <= bound:
+                series[self.FIELDS + i] += 1
+        for i, bound in enumerate(sizes):
+            if size <= bound:
+                series[self.FIELDS + len(latency) + i] += 1
+
+        if multiprocess_dir() and self._timer is None:
+            self._timer = threading.Timer(
+                getattr(settings, "METRICS_FLUSH_INTERVAL", 5), self._flush_on_timer
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def snapshot(self):
+        with self._shards_lock:
+            self._retire_dead_shards()
+            shards = [self._retired] + [dict(shard) for _, shard in self._shards]
+        return merge(shards)
+
+    def clear(self):
+        with self._shards_lock:
+            self._retired = {}
+            for _, shard in self._shards:
+                shard.clear()
+
+    def flush(self):
+        """Write this process's totals where other workers can read them."""
+        directory = multiprocess_dir()
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        data = [[*key, *series] for key, series in self.snapshot().items()]
+        with open(path + ".tmp", "w") as handle:
+            json.dump(data, handle)
+        os.replace(path + ".tmp", path)
+
+    def discard(self):
+        """Remove this process's flushed totals, so scrapes stop adding them."""
+        directory = multiprocess_dir()
+        if not directory:
+            return
+        try:
+            os.remove(os.path.join(directory, f"{os.getpid()}.json"))
+        except FileNotFoundError:
+            pass
+
+    def _flush_on_timer(self):
+        self._timer = None
+        self.flush()
+
+
+def merge(shards):
+    total = {}
+    for shard in shards:
+        for key, series in shard.items():
+            if key in total:
+                total[key] = [a + b for a, b in zip(total[key], series)]
+            else:
+                total[key] = list(series)
+    return total
+
+
+def multiprocess_dir():
+    return getattr(settings, "METRICS_MULTIPROC_DIR", None)
+
+
+def _alive(pid):
+    if os.name == "nt":
+        # os.kill() would terminate the process instead of probing it.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """
+    This process's live stats plus the last flush of every other running
+    worker. Files left by workers that died without cleaning up are
+    deleted, so their frozen totals don't count forever.
+    """
+    stats = [registry.snapshot()]
+    directory = multiprocess_dir()
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            pid, extension = os.path.splitext(name)
+            if extension != ".json" or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            path = os.path.join(directory, name)
+            if not _alive(int(pid)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                with open(path) as handle:
+                    rows = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            stats.append({tuple(row[:3]): row[3:] for row in rows})
+    return merge(stats)
+
+
+registry = Registry()
+atexit.register(registry.discard)
+
+
+@receiver(connection_created)
+def count_queries(sender, connection, **kwargs):
+    connection.execute_wrappers.append(_count_query)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _queries.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter[0] += 1
+        counter[1] += time.perf_counter() - start
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unresolved>"
+    view = getattr(match.func, "view_class", match.func)
+    return view.__name__
+
+
+class MetricsMiddleware:
+    """Records latency, DB queries and time, status and size per view."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        counter, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.finish(request, response, counter, start)
+        return response
+
+    async def __acall__(self, request):
+        counter, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.finish(request, response, counter, start)
+        return response
+
+    def start(self):
+        counter = [0, 0.0]
+        return counter, _queries.set(counter), time.perf_counter()
+
+    def finish(self, request, response, counter, start):
+        size = 0 if response.streaming else len(response.content)
+        registry.record(
+            view_name(request),
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            counter[0],
+            counter[1],
+            size,
+        )
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def render(stats):
+    """Format merged stats in the Prometheus text exposition format."""
+    latency, sizes = latency_buckets(), SIZE_BUCKETS
+    fields = Registry.FIELDS
+
+    # Histograms and DB totals are per view and method, across statuses.
+    by_view = merge(
+        {(view, method): series} for (view, method, _), series in stats.items()
+    )
+
+    lines = [
+        "# HELP http_requests_total Requests served, by view, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (view, method, status), series in sorted(stats.items()):
+        labels = _labels(view=view, method=method, status=status)
+        lines.append(f"http_requests_total{{{labels}}} {series[0]}")
+
+    def histogram(name, help, bounds, offset, total):
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} histogram")
+        for (view, method), series in sorted(by_view.items()):
+            labels = _labels(view=view, method=method)
+            for i, bound in enumerate(bounds):
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{bound}"}} {series[offset + i]}'
+                )
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series[0]}')
+            lines.append(f"{name}_sum{{{labels}}} {series[total]}")
+            lines.append(f"{name}_count{{{labels}}} {series[0]}")
+
+    histogram(
+        "http_request_duration_seconds",
+        "Time from the request entering the middleware to the response.",
+        latency,
+        fields,
+        1,
+    )
+    histogram(
+        "http_response_size_bytes",
+        "Size of non-streaming response bodies.",
+        sizes,
+        fields + len(latency),
+        4,
+    )
+
+    for name, help, index in [
+        ("http_db_queries_total", "Database queries run while serving requests.", 2),
+        (
+            "http_db_query_duration_seconds_total",
+            "Time spent in database queries while serving requests.",
+            3,
+        ),
+    ]:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} counter")
+        for (view, method), series in sorted(by_view.items()):
+            lines.append(
+                f"{name}{{{_labels(view=view, method=method)}}} {series[index]}"
+            )
+
+    return "\n".join(lines) + "\n"
+
+
+def scrape_allowed(request):
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return True
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"])
+    return request.META.get("REMOTE_ADDR") in allowed
+
+
+def metrics_view(request):
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(collect()), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-17 01:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model("api", "Post")
+    Comments = apps.get_model("api", "Comments")
+    Bookmark = apps.get_model("api", "Bookmark")
+    Likes = Post._meta.get_field("likes").remote_field.through
+
+    def count_of(model):
+        rows = (
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("*"))
+            .values("total")
+        )
+        return Coalesce(Subquery(rows), 0)
+
+    Post.objects.update(
+        likes_count=count_of(Likes),
+        comments_count=count_of(Comments),
+        bookmarks_count=count_of(Bookmark),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_rename_category_post_category_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="bookmarks_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
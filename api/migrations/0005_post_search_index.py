@@ -0,0 +1,64 @@
+from django.db import migrations
+
+
+# External-content FTS5 index over api_post. The triggers keep it in step
+# with the table, and only fire when an indexed column actually changes.
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE api_post_fts USING fts5(
+        title, description, tags,
+        content='api_post', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER api_post_fts_insert AFTER INSERT ON api_post BEGIN
+        INSERT INTO api_post_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER api_post_fts_delete AFTER DELETE ON api_post BEGIN
+        INSERT INTO api_post_fts(api_post_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER api_post_fts_update
+    AFTER UPDATE OF title, description, tags ON api_post BEGIN
+        INSERT INTO api_post_fts(api_post_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+        INSERT INTO api_post_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+    "INSERT INTO api_post_fts(api_post_fts) VALUES ('rebuild')",
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS api_post_fts_update",
+    "DROP TRIGGER IF EXISTS api_post_fts_delete",
+    "DROP TRIGGER IF EXISTS api_post_fts_insert",
+    "DROP TABLE IF EXISTS api_post_fts",
+]
+
+
+def run_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_authorstats"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FORWARD_SQL), run_sql(REVERSE_SQL)),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def populate_tags(apps, schema_editor):
+    Post = apps.get_model("api", "Post")
+    Tag = apps.get_model("api", "Tag")
+    PostTag = apps.get_model("api", "PostTag")
+
+    post_tags = []
+    names = {}
+    for post_id, value in Post.objects.values_list("id", "tags").iterator():
+        slugs = []
+        for name in (value or "").split(","):
+            name = name.strip()
+            slug = slugify(name)[:100]
+            if slug and slug not in slugs:
+                slugs.append(slug)
+                names.setdefault(slug, name)
+        post_tags.extend((post_id, slug) for slug in slugs)
+
+    Tag.objects.bulk_create(
+        [Tag(slug=slug, name=name) for slug, name in names.items()],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
+    tag_ids = dict(Tag.objects.values_list("slug", "id"))
+    PostTag.objects.bulk_create(
+        [PostTag(post_id=post_id, tag_id=tag_ids[slug]) for post_id, slug in post_tags],
+        ignore_conflicts=True,
+        batch_size=500,
+    )
+
+
+def clear_tags(apps, schema_editor):
+    apps.get_model("api", "PostTag").objects.all().delete()
+    apps.get_model("api", "Tag").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_tags"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_tags, clear_tags),
+    ]
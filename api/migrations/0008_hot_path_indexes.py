@@ -0,0 +1,103 @@
+# Generated by Django 4.2 on 2026-10-17 01:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_bookmarks(apps, schema_editor):
+    Bookmark = apps.get_model("api", "Bookmark")
+    Post = apps.get_model("api", "Post")
+    AuthorStats = apps.get_model("api", "AuthorStats")
+
+    keep = (
+        Bookmark.objects.order_by()
+        .values("user", "post")
+        .annotate(keep_id=Min("id"))
+        .values("keep_id")
+    )
+    duplicates = Bookmark.objects.exclude(id__in=keep)
+    post_ids = set(duplicates.values_list("post_id", flat=True))
+    if not post_ids:
+        return
+    duplicates.delete()
+
+    # The counters included the removed rows; recount the posts they were
+    # on and the authors of those posts.
+    def bookmarks(**lookups):
+        rows = (
+            Bookmark.objects.filter(**lookups)
+            .order_by()
+            .values(*lookups)
+            .annotate(total=Count("*"))
+            .values("total")
+        )
+        return Coalesce(Subquery(rows), 0)
+
+    Post.objects.filter(id__in=post_ids).update(
+        bookmarks_count=bookmarks(post=OuterRef("pk"))
+    )
+    user_ids = Post.objects.filter(id__in=post_ids).values("user")
+    AuthorStats.objects.filter(user__in=user_ids).update(
+        bookmarks=bookmarks(post__user=OuterRef("user"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("api", "0007_populate_tags"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comments",
+            index=models.Index(fields=["post", "-date"], name="comment_post_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "seen", "-date"], name="noti_user_seen_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["date"], name="post_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["status", "category", "date"],
+                name="post_status_category_date_idx",
+            ),
+        ),
+        # The composite indexes above lead with these columns.
+        migrations.AlterField(
+            model_name="comments",
+            name="post",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="api.post",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(remove_duplicate_bookmarks, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="bookmark",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="unique_bookmark_user_post"
+            ),
+        ),
+    ]
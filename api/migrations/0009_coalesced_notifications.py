@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-17 01:55
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def coalesce_unseen(apps, schema_editor):
+    Notification = apps.get_model("api", "Notification")
+    groups = (
+        Notification.objects.filter(seen=False)
+        .order_by()
+        .values("user", "post", "type")
+        .annotate(total=Count("id"), keep_id=Max("id"))
+        .filter(total__gt=1)
+    )
+    for group in groups.iterator():
+        Notification.objects.filter(
+            seen=False, user=group["user"], post=group["post"], type=group["type"]
+        ).exclude(id=group["keep_id"]).delete()
+        Notification.objects.filter(id=group["keep_id"]).update(count=group["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="count",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(coalesce_unseen, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="notification",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("seen", False)),
+                fields=("user", "post", "type"),
+                name="unique_unseen_notification",
+            ),
+        ),
+    ]
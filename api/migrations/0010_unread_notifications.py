@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-17 01:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread(apps, schema_editor):
+    AuthorStats = apps.get_model("api", "AuthorStats")
+    Notification = apps.get_model("api", "Notification")
+    unread = (
+        Notification.objects.filter(user=OuterRef("pk"), seen=False)
+        .order_by()
+        .values("user")
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    AuthorStats.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_coalesced_notifications"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="authorstats",
+            name="unread_notifications",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unread, migrations.RunPython.noop),
+    ]
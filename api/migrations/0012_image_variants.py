@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_job_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
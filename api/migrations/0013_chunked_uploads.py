@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-17 01:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import shortuuid.django_fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Upload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "handle",
+                    shortuuid.django_fields.ShortUUIDField(
+                        alphabet=None,
+                        length=22,
+                        max_length=25,
+                        prefix="up_",
+                        unique=True,
+                    ),
+                ),
+                ("filename", models.CharField(max_length=255)),
+                ("content_type", models.CharField(max_length=100)),
+                ("size", models.PositiveBigIntegerField()),
+                ("received", models.PositiveBigIntegerField(default=0)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("Uploading", "Uploading"), ("Complete", "Complete")],
+                        default="Uploading",
+                        max_length=100,
+                    ),
+                ),
+                ("date", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Upload",
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def _grouped(queryset, group_by, aggregate):
+    rows = (
+        queryset.order_by().values(group_by).annotate(total=aggregate).values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def create_missing_author_stats(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    Post = apps.get_model("api", "Post")
+    Bookmark = apps.get_model("api", "Bookmark")
+    Notification = apps.get_model("api", "Notification")
+    AuthorStats = apps.get_model("api", "AuthorStats")
+    Likes = Post._meta.get_field("likes").remote_field.through
+
+    posts = Post.objects.filter(user=OuterRef("pk"))
+    users = User.objects.filter(authorstats__isnull=True).annotate(
+        stat_views=_grouped(posts, "user", Sum("view")),
+        stat_posts=_grouped(posts, "user", Count("*")),
+        stat_likes=_grouped(
+            Likes.objects.filter(post__user=OuterRef("pk")), "post__user", Count("*")
+        ),
+        stat_bookmarks=_grouped(
+            Bookmark.objects.filter(post__user=OuterRef("pk")), "post__user", Count("*")
+        ),
+        stat_unread=_grouped(
+            Notification.objects.filter(user=OuterRef("pk"), seen=False),
+            "user",
+            Count("*"),
+        ),
+    )
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(
+                user_id=row["id"],
+                views=row["stat_views"],
+                posts=row["stat_posts"],
+                likes=row["stat_likes"],
+                bookmarks=row["stat_bookmarks"],
+                unread_notifications=row["stat_unread"],
+            )
+            for row in users.values(
+                "id",
+                "stat_views",
+                "stat_posts",
+                "stat_likes",
+                "stat_bookmarks",
+                "stat_unread",
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_chunked_uploads"),
+    ]
+
+    operations = [
+        # Every user gets a stats row up front; new ones get it on creation.
+        migrations.RunPython(create_missing_author_stats, migrations.RunPython.noop),
+    ]
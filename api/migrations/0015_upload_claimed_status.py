@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_backfill_author_stats"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="upload",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("Uploading", "Uploading"),
+                    ("Complete", "Complete"),
+                    ("Claimed", "Claimed"),
+                ],
+                default="Uploading",
+                max_length=100,
+            ),
+        ),
+    ]
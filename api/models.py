@@ -8,6 +8,37 @@ from shortuuid.django_fields import ShortUUIDField
 import shortuuid
 
 
+def _raw(value):
+    # File fields are loaded as strings but read back as FieldFile objects.
+    return getattr(value, "name", value)
+
+
+class TrackChangesMixin:
+    """Remembers the values a row was loaded with, for has_changed()."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def has_changed(self, *fields):
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return True
+        return any(
+            field not in loaded or loaded[field] != _raw(getattr(self, field))
+            for field in fields
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: _raw(getattr(self, field.attname))
+            for field in self._meta.concrete_fields
+        }
+
+
 class User(AbstractUser):
     username = models.CharField(unique=True, max_length=100)
     email = models.EmailField(unique=True)
@@ -30,11 +61,12 @@ class User(AbstractUser):
         super(User, self).save(*args, **kwargs)
 
 
-class Profile(models.Model):
+class Profile(TrackChangesMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     image = models.FileField(
         upload_to="image", default="default-user.jpg", null=True, blank=True
     )
+    image_variants = models.JSONField(default=dict, blank=True)
     full_name = models.CharField(max_length=100, null=True, blank=True)
     bio = models.CharField(max_length=100, null=True, blank=True)
     about = models.CharField(max_length=100, null=True, blank=True)
@@ -57,19 +89,27 @@ class Profile(models.Model):
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+        # A new user has nothing to count yet. Starting the stats row now
+        # keeps adjust_author_stats off its recompute fallback.
+        AuthorStats.objects.create(user=instance)
+
 
+def save_user_profile(sender, instance, created, **kwargs):
+    # The profile only copies defaults from the user; do it off the request.
+    if not created:
+        from api import jobs
 
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+        jobs.enqueue("save_user_profile", user_id=instance.id)
 
 
 post_save.connect(create_user_profile, sender=User)
 post_save.connect(save_user_profile, sender=User)
 
 
-class Category(models.Model):
+class Category(TrackChangesMixin, models.Model):
     title = models.CharField(max_length=100)
     image = models.FileField(upload_to="image", null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     slug = models.SlugField(unique=True, null=True, blank=True)
 
     def __str__(self):
@@ -85,10 +125,10 @@ class Category(models.Model):
         super(Category, self).save(*args, **kwargs)
 
     def post_count(self):
-        return Post.objects.filter(category=self).count()
+        return Post.objects.filter(category=self, status="Active").count()
 
 
-class Post(models.Model):
+class Post(TrackChangesMixin, models.Model):
 
     STATUS = {
         ("Active", "Active"),
@@ -107,11 +147,15 @@ class Post(models.Model):
     tags = models.CharField(max_length=100)
     description = models.CharField(max_length=255, null=True, blank=True)
     image = models.FileField(upload_to="images", null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     view = models.IntegerField(default=0)
     likes = models.ManyToManyField(User, blank=True, related_name="likes_user")
     status = models.CharField(choices=STATUS, max_length=100, default="Active")
     slug = models.SlugField(unique=True, null=True, blank=True)
     date = models.DateTimeField(auto_now_add=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    bookmarks_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.title
@@ -119,6 +163,14 @@ class Post(models.Model):
     class Meta:
         ordering = ["date"]
         verbose_name_plural = "Post"
+        indexes = [
+            # Keyset pagination on (date, id); SQLite appends the rowid.
+            models.Index(fields=["date"], name="post_date_idx"),
+            models.Index(
+                fields=["status", "category", "date"],
+                name="post_status_category_date_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if self.slug == "" or self.slug == None:
@@ -126,8 +178,58 @@ class Post(models.Model):
         super(Post, self).save(*args, **kwargs)
 
 
-class Comments(models.Model):
+class Tag(models.Model):
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True, max_length=100)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name_plural = "Tag"
+
+
+class PostTag(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f"{self.post.title} - {self.tag.name}"
+
+    class Meta:
+        constraints = [
+            # Doubles as the (tag, post) index used by tag lookups.
+            models.UniqueConstraint(fields=["tag", "post"], name="unique_post_tag"),
+        ]
+
+
+class Upload(models.Model):
+    STATUS = [
+        ("Uploading", "Uploading"),
+        ("Complete", "Complete"),
+        ("Claimed", "Claimed"),
+    ]
+
+    handle = ShortUUIDField(unique=True, length=22, prefix="up_")
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(choices=STATUS, max_length=100, default="Uploading")
+    date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.filename} - {self.status}"
+
+    class Meta:
+        verbose_name_plural = "Upload"
+
+
+class Comments(models.Model):
+    # Indexed by comment_post_date_idx, which leads with post.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, db_index=False)
     name = models.CharField(max_length=100)
     email = models.CharField(max_length=100)
     comment = models.CharField(max_length=255, null=True, blank=True)
@@ -140,6 +242,9 @@ class Comments(models.Model):
     class Meta:
         ordering = ["-date"]
         verbose_name_plural = "Comment"
+        indexes = [
+            models.Index(fields=["post", "-date"], name="comment_post_date_idx"),
+        ]
 
 
 class Bookmark(models.Model):
@@ -153,6 +258,11 @@ class Bookmark(models.Model):
     class Meta:
         ordering = ["-date"]
         verbose_name_plural = "Bookmark"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_bookmark_user_post"
+            ),
+        ]
 
 
 class Notification(models.Model):
@@ -162,9 +272,12 @@ class Notification(models.Model):
         ("Bookmark", "Bookmark"),
     }
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Indexed by noti_user_seen_date_idx, which leads with user.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     type = models.CharField(choices=NOTI_TYPE, max_length=100)
+    # Events coalesced into this notification since the user last saw it.
+    count = models.PositiveIntegerField(default=1)
     seen = models.BooleanField(default=False)
     date = models.DateTimeField(auto_now_add=True)
 
@@ -177,3 +290,61 @@ class Notification(models.Model):
     class Meta:
         ordering = ["-date"]
         verbose_name_plural = "Notification"
+        indexes = [
+            models.Index(
+                fields=["user", "seen", "-date"], name="noti_user_seen_date_idx"
+            ),
+        ]
+        constraints = [
+            # At most one open notification per (user, post, type).
+            models.UniqueConstraint(
+                fields=["user", "post", "type"],
+                condition=models.Q(seen=False),
+                name="unique_unseen_notification",
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    views = models.PositiveIntegerField(default=0)
+    posts = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    bookmarks = models.PositiveIntegerField(default=0)
+    unread_notifications = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.user.username
+
+    class Meta:
+        verbose_name_plural = "Author Stats"
+
+
+class Job(models.Model):
+    STATUS = [
+        ("Pending", "Pending"),
+        ("Running", "Running"),
+        ("Done", "Done"),
+        ("Failed", "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(choices=STATUS, max_length=100, default="Pending")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.status}"
+
+    class Meta:
+        ordering = ["run_at"]
+        verbose_name_plural = "Job"
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_status_run_at_idx"),
+        ]
@@ -0,0 +1,62 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api import models as api_models
+from api.counters import adjust_author_stats, recompute_author_stats
+
+
+def notify(user_id, post_id, type):
+    """
+    Record an event on the user's open notification for this post and type,
+    creating it if the user has seen (or never had) one. Readers then see a
+    single "N new likes" row per post instead of one row per event.
+    """
+    open_notifications = api_models.Notification.objects.filter(
+        user_id=user_id, post_id=post_id, type=type, seen=False
+    )
+    bump = {"count": F("count") + 1, "date": timezone.now()}
+
+    if open_notifications.update(**bump):
+        return
+
+    try:
+        with transaction.atomic():
+            api_models.Notification.objects.create(
+                user_id=user_id, post_id=post_id, type=type
+            )
+            adjust_author_stats(user_id, unread_notifications=1)
+    except IntegrityError:
+        # Lost the race to create it; the winner's row is now open.
+        open_notifications.update(**bump)
+
+
+def mark_seen(user_id, ids=None, up_to_id=None):
+    """
+    Mark the user's unseen notifications as seen in one UPDATE: those in
+    ``ids``, those with id <= ``up_to_id``, or all of them if neither is given.
+    """
+    unseen = api_models.Notification.objects.filter(user_id=user_id, seen=False)
+    if ids is not None:
+        unseen = unseen.filter(id__in=ids)
+    if up_to_id is not None:
+        unseen = unseen.filter(id__lte=up_to_id)
+
+    with transaction.atomic():
+        updated = unseen.update(seen=True)
+        if updated:
+            adjust_author_stats(user_id, unread_notifications=-updated)
+    return updated
+
+
+def unread_count(user_id):
+    """The dashboard badge count, read from the author's AuthorStats row."""
+    count = (
+        api_models.AuthorStats.objects.filter(user_id=user_id)
+        .values_list("unread_notifications", flat=True)
+        .first()
+    )
+    if count is None:
+        recompute_author_stats([user_id])
+        count = api_models.AuthorStats.objects.get(user_id=user_id).unread_notifications
+    return count
@@ -0,0 +1,167 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on every column of a unique ordering
+    instead of DRF's first-column position plus offset, so every page is
+    a single indexed range scan with a LIMIT and never an OFFSET.
+    """
+
+    ordering = ("id",)
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([obj async for obj in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        Return ``queryset`` narrowed to the requested page plus one row, or
+        None if pagination is off. Pass the fetched rows to set_page().
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            self.reverse, self.position = False, None
+        else:
+            self.reverse, self.position = self.cursor.reverse, self.cursor.position
+
+        if self.reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.position is not None:
+            try:
+                queryset = queryset.filter(
+                    self._seek_filter(self.position, self.reverse)
+                )
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        reverse, position = self.reverse, self.position
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if self.page:
+            self.next_position = self._get_position_from_instance(
+                self.page[-1], self.ordering
+            )
+            self.previous_position = self._get_position_from_instance(
+                self.page[0], self.ordering
+            )
+        else:
+            self.next_position = self.previous_position = position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position)
+        )
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+
+        try:
+            values = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Positions we encode hold strings; anything nested can't go in a Q.
+        if any(
+            isinstance(value, bool) or not isinstance(value, (str, int))
+            for value in values
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=cursor.reverse, position=cursor.position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            values.append(str(attr))
+        return json.dumps(values)
+
+    def _seek_filter(self, position, reverse):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        values = json.loads(position)
+        seek = Q()
+        equal = Q()
+        for order, value in zip(self.ordering, values):
+            field_name = order.lstrip("-")
+            descending = order.startswith("-") != reverse
+            lookup = "__lt" if descending else "__gt"
+            seek |= equal & Q(**{field_name + lookup: value})
+            equal &= Q(**{field_name: value})
+        return seek
+
+
+class PostCursorPagination(KeysetCursorPagination):
+    # Must stay in step with Post.Meta.ordering, with id as the tie-breaker.
+    ordering = ("date", "id")
+
+
+class SearchPagination(PageNumberPagination):
+    # Relevance order has no stable key to seek on, so search pages by number.
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,79 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def related_lookups(serializer, prefix="", prefetching=False):
+    """
+    Walk a serializer's fields and return the (select_related,
+    prefetch_related) lookups needed to render it without per-row queries.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    if model is None:
+        return [], []
+
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*" or "." in field.source:
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + field.source
+        many = model_field.many_to_many or model_field.one_to_many
+
+        if isinstance(field, serializers.ListSerializer) or (
+            isinstance(field, serializers.BaseSerializer) and many
+        ):
+            prefetch.append(lookup)
+            _, nested = related_lookups(field, lookup + "__", prefetching=True)
+            prefetch.extend(nested)
+        elif isinstance(field, serializers.BaseSerializer):
+            (prefetch if prefetching else select).append(lookup)
+            nested_select, nested_prefetch = related_lookups(
+                field, lookup + "__", prefetching
+            )
+            (prefetch if prefetching else select).extend(nested_select)
+            prefetch.extend(nested_prefetch)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(lookup)
+
+    return select, prefetch
+
+
+_plans = {}
+
+
+def plan_queryset(queryset, serializer):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    # Serializer classes are fixed per process, so their plan is too.
+    plan = _plans.get(type(serializer))
+    if plan is None:
+        plan = _plans[type(serializer)] = related_lookups(serializer)
+
+    select, prefetch = plan
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    Generic view mixin that applies the select_related/prefetch_related
+    lookups implied by the view's serializer to every queryset it filters.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return plan_queryset(queryset, self.get_serializer())
@@ -0,0 +1,110 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY_COOKIE = "db_primary"
+
+_state = ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    def __init__(self, request, pinned):
+        self.request = request
+        self.pinned = pinned
+
+
+def is_pinned():
+    """Whether the current request reads from the primary to see its writes."""
+    state = _state.get()
+    return state is not None and state.pinned
+
+
+def replica_aliases():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def _view_reads_from_replica(request):
+    match = getattr(request, "resolver_match", None)
+    view = getattr(match.func, "view_class", None) if match else None
+    return getattr(view, "replica_reads", False)
+
+
+class ReplicaRouter:
+    """
+    Sends reads made while serving a view with ``replica_reads = True`` to a
+    random replica, and everything else to the primary. Once a request has
+    written, it and the client's requests for the next REPLICA_PIN_SECONDS
+    read from the primary, so users always see their own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = replica_aliases()
+        if state is None or state.pinned or not replicas:
+            return DEFAULT_DB_ALIAS
+        if not _view_reads_from_replica(state.request):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
+
+
+class ReplicaRoutingMiddleware:
+    """Tracks, per request, whether reads may go to a replica."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = self.start(request)
+        try:
+            return self.finish(self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            return self.finish(await self.get_response(request))
+        finally:
+            _state.reset(token)
+
+    def start(self, request):
+        pinned = (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            or PRIMARY_COOKIE in request.COOKIES
+        )
+        return _state.set(RoutingState(request, pinned))
+
+    def finish(self, response):
+        if _state.get().pinned:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
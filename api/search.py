@@ -0,0 +1,147 @@
+import re
+
+from django.db import connection, connections, router
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+from api import models as api_models
+
+FTS_TABLE = "api_post_fts"
+
+# bm25() column weights for (title, description, tags).
+FTS_WEIGHTS = (10.0, 4.0, 6.0)
+
+
+def search_available():
+    return connection.vendor == "sqlite"
+
+
+def match_expression(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word must
+    appear, and the last one may be a prefix.
+    """
+    words = re.findall(r"\w+", query or "")
+    if not words:
+        return None
+    terms = ['"%s"' % word for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+# Same triggers as migration 0005. SQLite drops triggers whenever a migration
+# rebuilds api_post (e.g. adding a column with a CHECK), so they are
+# re-created after every migrate run.
+TRIGGERS = {
+    "api_post_fts_insert": f"""
+        CREATE TRIGGER api_post_fts_insert AFTER INSERT ON api_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description, tags)
+            VALUES (new.id, new.title, new.description, new.tags);
+        END
+    """,
+    "api_post_fts_delete": f"""
+        CREATE TRIGGER api_post_fts_delete AFTER DELETE ON api_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags)
+            VALUES ('delete', old.id, old.title, old.description, old.tags);
+        END
+    """,
+    "api_post_fts_update": f"""
+        CREATE TRIGGER api_post_fts_update
+        AFTER UPDATE OF title, description, tags ON api_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, tags)
+            VALUES ('delete', old.id, old.title, old.description, old.tags);
+            INSERT INTO {FTS_TABLE}(rowid, title, description, tags)
+            VALUES (new.id, new.title, new.description, new.tags);
+        END
+    """,
+}
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def ensure_triggers(using=connection):
+    """
+    Re-create any missing sync trigger and, if one was missing, rebuild the
+    index since writes may have been missed. Returns the triggers created.
+    """
+    if using.vendor != "sqlite":
+        return []
+
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [FTS_TABLE, *TRIGGERS],
+        )
+        existing = {name: type for type, name in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return []
+
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return missing
+
+
+@receiver(post_migrate)
+def restore_triggers(sender, using, **kwargs):
+    if sender.name == "api":
+        ensure_triggers(connections[using])
+
+
+class PostSearchResults:
+    """
+    Lazily evaluated, bm25-ranked search over active posts. Supports the
+    count() and slicing that Django's Paginator needs, so each page is one
+    ranked LIMIT/OFFSET query against the index plus one fetch of the posts.
+    """
+
+    def __init__(self, query, queryset=None):
+        self.match = match_expression(query)
+        if queryset is None:
+            queryset = api_models.Post.objects.all()
+        self.queryset = queryset
+
+    def _sql(self, select):
+        return (
+            f"SELECT {select} FROM {FTS_TABLE} "
+            f"JOIN api_post ON api_post.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND api_post.status = 'Active'"
+        )
+
+    def _cursor(self):
+        # Same database the posts themselves are read from.
+        return connections[router.db_for_read(api_models.Post)].cursor()
+
+    def count(self):
+        if self.match is None:
+            return 0
+        with self._cursor() as cursor:
+            cursor.execute(self._sql("COUNT(*)"), [self.match])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        if self.match is None:
+            return []
+
+        start = index.start or 0
+        limit = -1 if index.stop is None else max(index.stop - start, 0)
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        sql = self._sql(f"api_post.id, bm25({FTS_TABLE}, {weights}) AS rank")
+        sql += " ORDER BY rank, api_post.id LIMIT %s OFFSET %s"
+
+        with self._cursor() as cursor:
+            cursor.execute(sql, [self.match, limit, start])
+            ids = [row[0] for row in cursor.fetchall()]
+
+        posts = self.queryset.in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
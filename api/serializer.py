@@ -1,9 +1,31 @@
+import copy
+
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import Token
 
 from api import models as api_models
+from api.images import ImageVariantsField
+from api.token_blacklist import RefreshToken
+
+
+class CachedFieldsMixin:
+    """
+    Builds a serializer class's fields once per process and hands each
+    instance a copy, instead of re-introspecting the model per request.
+    """
+
+    def get_fields(self):
+        cls = type(self)
+        fields = cls.__dict__.get("_prototype_fields")
+        if fields is None:
+            fields = super().get_fields()
+            cls._prototype_fields = fields
+        return copy.deepcopy(fields)
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -17,6 +39,10 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True, required=True, validators=[validate_password]
@@ -57,74 +83,117 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class ProfileSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = api_models.Profile
         fields = "__all__"
 
 
 class CategorySerializer(serializers.ModelSerializer):
-    def get_post_count(self, category):
-        return category.posts.count()
+    # Annotated by api.cache.category_list() in a single GROUP BY query.
+    post_count = serializers.IntegerField(read_only=True)
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = api_models.Category
+        fields = ["id", "title", "image", "image_variants", "slug", "post_count"]
+
+
+class TagSerializer(serializers.ModelSerializer):
+    post_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = api_models.Tag
+        fields = ["id", "name", "slug", "post_count"]
+
+
+# The nested shapes of the read serializers below. ``depth = 1`` would build
+# a fresh serializer class for each relation on every instance; declaring
+# them lets CachedFieldsMixin build their fields once too, and renders image
+# variants as URLs at every level.
+class NestedUserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = api_models.User
+        fields = "__all__"
+
+
+class NestedProfileSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = api_models.Profile
+        fields = "__all__"
+
+
+class NestedCategorySerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = api_models.Category
-        fields = ["id", "title", "image", "slug", "post_count"]
+        fields = "__all__"
+
+
+class NestedPostSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
 
+    class Meta:
+        model = api_models.Post
+        fields = "__all__"
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class CommentSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = api_models.Comments
         fields = "__all__"
 
-    def __init__(self, *args, **kwargs):
-        super(CommentSerializer, self).__init__(*args, **kwargs)
-        request = self.context.get("request")
-        if request and request.method == "POST":
-            self.Meta.depth = 0
-        else:
-            self.Meta.depth = 1
+
+class CommentReadSerializer(CommentSerializer):
+    post = NestedPostSerializer(read_only=True)
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = api_models.Post
         fields = "__all__"
 
-    def __init__(self, *args, **kwargs):
-        super(PostSerializer, self).__init__(*args, **kwargs)
-        request = self.context.get("request")
-        if request and request.method == "POST":
-            self.Meta.depth = 0
-        else:
-            self.Meta.depth = 1
+
+class PostReadSerializer(PostSerializer):
+    user = NestedUserSerializer(read_only=True)
+    profile = NestedProfileSerializer(read_only=True)
+    category = NestedCategorySerializer(read_only=True)
+    likes = NestedUserSerializer(many=True, read_only=True)
 
 
-class BookmarkSerializer(serializers.ModelSerializer):
+class BookmarkSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = api_models.Bookmark
         fields = "__all__"
 
-    def __init__(self, *args, **kwargs):
-        super(BookmarkSerializer, self).__init__(*args, **kwargs)
-        request = self.context.get("request")
-        if request and request.method == "POST":
-            self.Meta.depth = 0
-        else:
-            self.Meta.depth = 1
+
+class BookmarkReadSerializer(BookmarkSerializer):
+    user = NestedUserSerializer(read_only=True)
+    post = NestedPostSerializer(read_only=True)
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = api_models.Notification
         fields = "__all__"
 
-    def __init__(self, *args, **kwargs):
-        super(NotificationSerializer, self).__init__(*args, **kwargs)
-        request = self.context.get("request")
-        if request and request.method == "POST":
-            self.Meta.depth = 0
-        else:
-            self.Meta.depth = 1
+
+class NotificationReadSerializer(NotificationSerializer):
+    user = NestedUserSerializer(read_only=True)
+    post = NestedPostSerializer(read_only=True)
+    message = serializers.SerializerMethodField()
+
+    def get_message(self, notification):
+        noun = notification.type.lower()
+        if notification.count != 1:
+            noun += "s"
+        return f"{notification.count} new {noun} on {notification.post.title}"
 
 
 class AuthorSerializer(serializers.Serializer):
@@ -0,0 +1,81 @@
+import threading
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# Production SQLite profile. Connections made by the api.backends.sqlite3
+# engine get these PRAGMAs, and their writes go through a WriteGate.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "wal",
+    "busy_timeout": 5000,
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB: 64 MiB
+}
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def pragmas():
+    return {**DEFAULT_PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+
+
+def read_only(connection):
+    return "mode=ro" in str(connection.settings_dict["NAME"])
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if not getattr(connection, "production_profile", False):
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas().items():
+            if name == "journal_mode" and (
+                connection.is_in_memory_db() or read_only(connection)
+            ):
+                # Set on the primary's file; these connections can't change it.
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+class WriteGate:
+    """
+    A process-wide lock that a connection holds from the start of a write
+    transaction (or single autocommit write) until it commits or rolls
+    back. Threads queue here instead of racing for SQLite's file lock and
+    failing with "database is locked".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.holder = None
+
+    def acquire(self, connection):
+        timeout = getattr(settings, "SQLITE_WRITE_GATE_TIMEOUT", 30)
+        if not self._lock.acquire(timeout=timeout):
+            raise OperationalError(
+                f"database is locked: waited {timeout}s for the write gate"
+            )
+        self.holder = connection
+
+    def release(self, connection):
+        if self.holder is connection:
+            self.holder = None
+            self._lock.release()
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def write_gate(name):
+    """The gate shared by every connection to the database file ``name``."""
+    with _gates_lock:
+        return _gates.setdefault(str(name), WriteGate())
+
+
+def is_write(sql):
+    return sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
@@ -0,0 +1,38 @@
+from django.utils.text import slugify
+
+from api import models as api_models
+
+
+def parse_tags(value):
+    """Split a comma separated tags string into {slug: name}, first wins."""
+    tags = {}
+    for name in (value or "").split(","):
+        name = name.strip()
+        slug = slugify(name)[:100]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def sync_post_tags(post):
+    """Bring the post's PostTag rows in line with its ``tags`` string."""
+    wanted = parse_tags(post.tags)
+
+    api_models.Tag.objects.bulk_create(
+        [api_models.Tag(slug=slug, name=name) for slug, name in wanted.items()],
+        ignore_conflicts=True,
+    )
+    tag_ids = set(
+        api_models.Tag.objects.filter(slug__in=wanted).values_list("id", flat=True)
+    )
+
+    current = set(
+        api_models.PostTag.objects.filter(post=post).values_list("tag_id", flat=True)
+    )
+    if current - tag_ids:
+        api_models.PostTag.objects.filter(
+            post=post, tag_id__in=current - tag_ids
+        ).delete()
+    api_models.PostTag.objects.bulk_create(
+        [api_models.PostTag(post=post, tag_id=tag_id) for tag_id in tag_ids - current]
+    )
@@ -1,3 +1,1562 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from api import models as api_models
+from api import benchmarks
+from api import jobs as api_jobs
+from api import uploads as api_uploads
+from api import urls as api_urls
+from api.cache import CATEGORY_LIST_KEY
+from api.authentication import CachedJWTAuthentication, users
+from api.counters import find_author_stats_drift, find_counter_drift
+from api.metrics import collect, registry
+from api.notifications import notify
+from api.routers import ReplicaRoutingMiddleware
+from api.views import BookmarkPostAPIView
+from api.tags import parse_tags
+from api.sqlite import pragmas
+from api.serializer import (
+    CommentReadSerializer,
+    MyTokenObtainPairSerializer,
+    PostReadSerializer,
+    PostSerializer,
+)
+from api.view_buffer import ViewCountBuffer, view_counter
+from api.throttling import (
+    CacheBuckets,
+    IPTokenBucketThrottle,
+    TokenBucketThrottle,
+    UserTokenBucketThrottle,
+    local_buckets,
+)
+from api.token_blacklist import RefreshToken, blacklisted, prune_expired_tokens
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = api_models.User.objects.create(email="author@example.com")
+        posts = [
+            api_models.Post.objects.create(
+                user=user, title=f"Post {i}", tags="", slug=f"post-{i}"
+            )
+            for i in range(7)
+        ]
+        # Five posts share a date, so pages must break ties on id.
+        same = timezone.now()
+        api_models.Post.objects.filter(id__in=[p.id for p in posts[1:6]]).update(
+            date=same
+        )
+        api_models.Post.objects.filter(id=posts[6].id).update(
+            date=same + timedelta(days=1)
+        )
+        api_models.Post.objects.filter(id=posts[0].id).update(
+            date=same - timedelta(days=1)
+        )
+        self.ids = [post.id for post in posts]
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [post["id"] for post in data["results"]], data
+
+    def test_walks_forward_and_back_through_tied_dates(self):
+        forward = []
+        url = "/api/v1/post/list/?page_size=2"
+        pages = []
+        while url:
+            ids, data = self.page(url)
+            pages.append(ids)
+            forward += ids
+            url = data["next"]
+        self.assertEqual(forward, self.ids)
+        self.assertEqual([len(ids) for ids in pages], [2, 2, 2, 1])
+
+        # Walk back from the last page; each page matches the forward one.
+        backward = [ids]
+        while data["previous"]:
+            ids, data = self.page(data["previous"])
+            backward.append(ids)
+        self.assertEqual(backward, pages[::-1])
+
+    def test_invalid_cursors_are_not_found(self):
+        for cursor in ["garbage", "cD1bIjEiXQ%3D%3D", "cD1ub3Rqc29u"]:
+            response = self.client.get(f"/api/v1/post/list/?cursor={cursor}")
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_crafted_cursor_positions_are_not_found(self):
+        for position in [[[1], [2]], [{"a": 1}, 2], [None, 1], [True, 1]]:
+            query = urlencode({"p": json.dumps(position)})
+            cursor = base64.b64encode(query.encode()).decode()
+            response = self.client.get(
+                "/api/v1/post/list/", {"cursor": cursor, "page_size": 2}
+            )
+            self.assertEqual(response.status_code, 404, position)
+
+
+class ViewCountBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = api_models.User.objects.create(email="author@example.com")
+        self.posts = [
+            api_models.Post.objects.create(
+                user=user, title=f"Post {i}", tags="", slug=f"post-{i}", view=10
+            )
+            for i in range(2)
+        ]
+
+    def test_flush_writes_one_update_per_post(self):
+        buffer = ViewCountBuffer(interval=60)
+        first, second = self.posts
+        for _ in range(3):
+            buffer.record(first.id)
+        buffer.record(second.id, count=2)
+        self.assertEqual(buffer.pending(first.id), 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(buffer.flush(), {first.id: 3, second.id: 2})
+        updates = [
+            q["sql"]
+            for q in queries
+            if q["sql"].startswith('UPDATE "api_post"') and '"view"' in q["sql"]
+        ]
+        self.assertEqual(len(updates), 2)
+        self.assertTrue(all('"view" = ("api_post"."view" + ' in sql for sql in updates))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.view, second.view), (13, 12))
+        self.assertEqual(buffer.pending(first.id), 0)
+        self.assertEqual(buffer.flush(), {})
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=60)
+    def test_readers_see_persisted_plus_pending_views(self):
+        self.addCleanup(view_counter.flush)
+        post = self.posts[0]
+        url = f"/api/v1/post/details/{post.slug}/"
+
+        # The second read is served from the response cache.
+        self.assertEqual(self.client.get(url).json()["view"], 11)
+        self.assertEqual(self.client.get(url).json()["view"], 12)
+        post.refresh_from_db()
+        self.assertEqual(post.view, 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            view_counter.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.view, 12)
+        self.assertEqual(self.client.get(url).json()["view"], 13)
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=60)
+    def test_flush_keeps_cached_lists(self):
+        self.addCleanup(view_counter.flush)
+        post = self.posts[0]
+
+        def list_views():
+            results = self.client.get("/api/v1/post/list/").json()["results"]
+            return {row["id"]: row["view"] for row in results}[post.id]
+
+        self.assertEqual(list_views(), 10)
+        self.client.get(f"/api/v1/post/details/{post.slug}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            view_counter.flush()
+
+        self.assertEqual(list_views(), 10)
+        detail = self.client.get(f"/api/v1/post/details/{post.slug}/").json()
+        self.assertEqual(detail["view"], 12)
+
+
+class PostCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_buckets.clear()
+        self.client = APIClient()
+        self.author = api_models.User.objects.create(email="author@example.com")
+        self.reader = api_models.User.objects.create(email="reader@example.com")
+        self.post = api_models.Post.objects.create(
+            user=self.author, title="Post", tags="", slug="post"
+        )
+
+    def toggle(self, kind):
+        return self.client.post(
+            f"/api/v1/post/{kind}-post/",
+            {"user_id": self.reader.id, "post_id": self.post.id},
+        )
+
+    def counts(self):
+        self.post.refresh_from_db()
+        stats = api_models.AuthorStats.objects.get(user=self.author)
+        return (
+            (self.post.likes_count, self.post.bookmarks_count),
+            (stats.likes, stats.bookmarks),
+        )
+
+    def assertNoDrift(self):
+        self.assertEqual(list(find_counter_drift()), [])
+        self.assertEqual(list(find_author_stats_drift()), [])
+
+    def test_toggles_move_counters_by_rows_changed(self):
+        self.assertEqual(self.toggle("like").status_code, 201)
+        self.assertEqual(self.toggle("bookmark").status_code, 201)
+        self.assertEqual(self.counts(), ((1, 1), (1, 1)))
+        self.assertNoDrift()
+
+        self.assertEqual(self.toggle("like").status_code, 200)
+        self.assertEqual(self.toggle("bookmark").status_code, 200)
+        self.assertEqual(self.counts(), ((0, 0), (0, 0)))
+        self.assertNoDrift()
+
+    def test_removing_a_vanished_row_does_not_decrement(self):
+        self.toggle("bookmark")
+        self.toggle("like")
+        # Another request removes both rows (and the counts) first.
+        api_models.Bookmark.objects.all().delete()
+        self.post.likes.clear()
+        call_command("rebuild_post_counters", stdout=io.StringIO())
+        call_command("rebuild_author_stats", stdout=io.StringIO())
+
+        # The next toggles find nothing to remove, so they add instead.
+        self.assertEqual(self.toggle("bookmark").status_code, 201)
+        self.assertEqual(self.toggle("like").status_code, 201)
+        self.assertEqual(self.counts(), ((1, 1), (1, 1)))
+        self.assertNoDrift()
+
+    def test_comments_count(self):
+        response = self.client.post(
+            "/api/v1/post/comment-post/",
+            {"post_id": self.post.id, "name": "R", "email": "r@x.com", "comment": "Hi"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertNoDrift()
+
+    def test_rebuild_commands_detect_and_fix_drift(self):
+        self.toggle("like")
+        api_models.Post.objects.update(likes_count=5)
+        api_models.AuthorStats.objects.update(likes=7)
+
+        drift = list(find_counter_drift())
+        self.assertEqual(
+            [
+                (row["id"], row["likes_count"], row["actual_likes_count"])
+                for row in drift
+            ],
+            [(self.post.id, 5, 1)],
+        )
+        with self.assertRaises(CommandError):
+            call_command("rebuild_post_counters", check=True, stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command("rebuild_author_stats", check=True, stdout=io.StringIO())
+
+        call_command("rebuild_post_counters", stdout=io.StringIO())
+        call_command("rebuild_author_stats", stdout=io.StringIO())
+        self.assertEqual(self.counts(), ((1, 0), (1, 0)))
+        call_command("rebuild_post_counters", check=True, stdout=io.StringIO())
+        call_command("rebuild_author_stats", check=True, stdout=io.StringIO())
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+class AuthorStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_buckets.clear()
+        self.client = APIClient()
+        self.author = api_models.User.objects.create(email="author@example.com")
+        self.reader = api_models.User.objects.create(email="reader@example.com")
+        self.category = api_models.Category.objects.create(title="News", slug="news")
+
+    def create_post(self, title):
+        response = self.client.post(
+            "/api/v1/author/dashboard/post-create/,",
+            {
+                "user_id": self.author.id,
+                "title": title,
+                "description": "Body",
+                "tags": "news",
+                "category": self.category.id,
+                "post_status": "Active",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        post = api_models.Post.objects.get(title=title)
+        # The create view leaves slugs empty; details are looked up by slug.
+        api_models.Post.objects.filter(id=post.id).update(slug=f"post-{post.id}")
+        post.refresh_from_db()
+        return post
+
+    def interact(self, post):
+        data = {"user_id": self.reader.id, "post_id": post.id}
+        self.client.post("/api/v1/post/like-post/", data)
+        self.client.post("/api/v1/post/bookmark-post/", data)
+        self.client.get(f"/api/v1/post/details/{post.slug}/")
+
+    def test_rows_start_with_the_user(self):
+        self.assertEqual(
+            api_models.AuthorStats.objects.filter(user=self.reader).count(), 1
+        )
+
+    def test_incremental_updates_match_a_recompute(self):
+        kept = self.create_post("Kept")
+        dropped = self.create_post("Dropped")
+        self.interact(kept)
+        self.interact(dropped)
+        self.client.post(
+            "/api/v1/post/like-post/", {"user_id": self.author.id, "post_id": kept.id}
+        )
+        self.assertEqual(list(find_author_stats_drift()), [])
+
+        response = self.client.delete(
+            f"/api/v1/author/dashboard/post-detail/{self.author.id}/{dropped.id}/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(find_author_stats_drift()), [])
+
+        stats = api_models.AuthorStats.objects.get(user=self.author)
+        self.assertEqual(
+            (stats.posts, stats.views, stats.likes, stats.bookmarks), (1, 1, 2, 1)
+        )
+
+
+class PostSerializerTests(TestCase):
+    def setUp(self):
+        self.user = api_models.User.objects.create(email="author@example.com")
+        self.category = api_models.Category.objects.create(title="News", slug="news")
+        self.post = api_models.Post.objects.create(
+            user=self.user,
+            profile=self.user.profile,
+            category=self.category,
+            title="Post",
+            slug="post",
+        )
+
+    def test_read_nests_and_write_takes_ids(self):
+        read = PostReadSerializer(self.post).data
+        write = PostSerializer(self.post).data
+        self.assertEqual(read["category"]["slug"], "news")
+        self.assertEqual(write["category"], self.category.id)
+        # The read class nests declared serializers instead of using depth.
+        self.assertFalse(hasattr(PostSerializer.Meta, "depth"))
+        self.assertFalse(hasattr(PostReadSerializer.Meta, "depth"))
+
+    def test_nested_image_variants_are_urls(self):
+        variants = {"full.webp": "image/variants/abc.webp"}
+        for row in (self.post, self.category, self.user.profile):
+            type(row).objects.filter(pk=row.pk).update(image_variants=variants)
+        self.post.refresh_from_db()
+        comment = api_models.Comments.objects.create(post=self.post, comment="Hi")
+        request = Request(RequestFactory().get("/"))
+        url = {"full.webp": "http://testserver/media/image/variants/abc.webp"}
+
+        post = PostReadSerializer(self.post, context={"request": request}).data
+        self.assertEqual(post["image_variants"], url)
+        self.assertEqual(post["category"]["image_variants"], url)
+        self.assertEqual(post["profile"]["image_variants"], url)
+        nested = CommentReadSerializer(comment, context={"request": request}).data
+        self.assertEqual(nested["post"]["image_variants"], url)
+
+    def test_fields_are_built_once_and_copied(self):
+        self.post.likes.add(self.user)
+        first = PostReadSerializer(self.post)
+        first.data
+
+        built = []
+        get_fields = serializers.ModelSerializer.get_fields
+
+        def counting_get_fields(serializer):
+            built.append(type(serializer).__name__)
+            return get_fields(serializer)
+
+        with mock.patch.object(
+            serializers.ModelSerializer, "get_fields", counting_get_fields
+        ):
+            second = PostReadSerializer(self.post)
+            self.assertEqual(second.data["likes"][0]["id"], self.user.id)
+        self.assertEqual(built, [])
+        self.assertIsNot(first.fields["category"], second.fields["category"])
+        self.assertIsNot(
+            first.fields["category"].fields["slug"],
+            second.fields["category"].fields["slug"],
+        )
+
+
+class CategoryListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def titles(self):
+        response = self.client.get("/api/v1/post/category/list/")
+        return [category["title"] for category in response.json()]
+
+    def test_cleared_only_once_the_write_commits(self):
+        self.assertEqual(self.titles(), [])
+        with self.captureOnCommitCallbacks() as callbacks:
+            api_models.Category.objects.create(title="News", slug="news")
+        self.assertEqual(cache.get(CATEGORY_LIST_KEY), [])
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(CATEGORY_LIST_KEY))
+        self.assertEqual(self.titles(), ["News"])
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+class ResponseCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_buckets.clear()
+        self.client = APIClient()
+        self.author = api_models.User.objects.create(email="author@example.com")
+        self.reader = api_models.User.objects.create(email="reader@example.com")
+        self.news = api_models.Category.objects.create(title="News", slug="news")
+        self.sport = api_models.Category.objects.create(title="Sport", slug="sport")
+        self.post = api_models.Post.objects.create(
+            user=self.author,
+            profile=self.author.profile,
+            category=self.news,
+            title="Old title",
+            tags="",
+            slug="post",
+            status="Active",
+        )
+        self.detail = "/api/v1/post/details/post/"
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return [post["title"] for post in response.json()["results"]]
+
+    def detail_field(self, field):
+        return self.client.get(self.detail).json()[field]
+
+    def test_post_edits_refresh_every_page_showing_the_post(self):
+        self.assertEqual(self.titles("/api/v1/post/list/"), ["Old title"])
+        self.assertEqual(
+            self.titles("/api/v1/post/category/posts/news/"), ["Old title"]
+        )
+        self.assertEqual(self.titles("/api/v1/post/category/posts/sport/"), [])
+        self.assertEqual(self.detail_field("title"), "Old title")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = "New title"
+            self.post.category = self.sport
+            self.post.save()
+
+        self.assertEqual(self.titles("/api/v1/post/list/"), ["New title"])
+        self.assertEqual(self.titles("/api/v1/post/category/posts/news/"), [])
+        self.assertEqual(
+            self.titles("/api/v1/post/category/posts/sport/"), ["New title"]
+        )
+        self.assertEqual(self.detail_field("title"), "New title")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertEqual(self.titles("/api/v1/post/list/"), [])
+        self.assertEqual(self.titles("/api/v1/post/category/posts/sport/"), [])
+
+    def test_clients_pinned_to_the_primary_skip_the_cache(self):
+        self.assertEqual(self.titles("/api/v1/post/list/"), ["Old title"])
+
+        # The write's invalidation hasn't happened yet, as on a lagging
+        # replica; only the writer, pinned by its cookie, sees the new row.
+        api_models.Post.objects.create(
+            user=self.author, title="New post", tags="", slug="new", status="Active"
+        )
+        self.client.cookies["db_primary"] = "1"
+        self.assertEqual(self.titles("/api/v1/post/list/"), ["Old title", "New post"])
+        del self.client.cookies["db_primary"]
+        self.assertEqual(self.titles("/api/v1/post/list/"), ["Old title"])
+
+    def test_comments_refresh_the_post(self):
+        self.assertEqual(self.detail_field("comments_count"), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/post/comment-post/",
+                {
+                    "post_id": self.post.id,
+                    "name": "Reader",
+                    "email": "reader@example.com",
+                    "comment": "Nice",
+                },
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.detail_field("comments_count"), 1)
+
+    def test_likes_refresh_the_post(self):
+        self.assertEqual(self.detail_field("likes_count"), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/v1/post/like-post/",
+                {"user_id": self.reader.id, "post_id": self.post.id},
+            )
+        self.assertEqual(self.detail_field("likes_count"), 1)
+
+        # Likes added outside the views arrive through m2m_changed.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.likes_user.add(self.post)
+        self.assertEqual(len(self.detail_field("likes")), 2)
+
+    def test_author_edits_refresh_post_pages(self):
+        def first_post():
+            return self.client.get("/api/v1/post/list/").json()["results"][0]
+
+        self.assertEqual(first_post()["user"]["full_name"], "author")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.full_name = "Ada"
+            self.author.save()
+        self.assertEqual(first_post()["user"]["full_name"], "Ada")
+
+        self.assertEqual(first_post()["profile"]["bio"], None)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = api_models.Profile.objects.get(user=self.author)
+            profile.bio = "Writes about sport"
+            profile.save()
+        self.assertEqual(first_post()["profile"]["bio"], "Writes about sport")
+
+
+class PostTagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_buckets.clear()
+        self.client = APIClient()
+        self.author = api_models.User.objects.create(email="author@example.com")
+        self.category = api_models.Category.objects.create(title="News", slug="news")
+
+    def create_post(self, title, tags, status="Active"):
+        response = self.client.post(
+            "/api/v1/author/dashboard/post-create/,",
+            {
+                "user_id": self.author.id,
+                "title": title,
+                "description": "Body",
+                "tags": tags,
+                "category": self.category.id,
+                "post_status": status,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return api_models.Post.objects.get(title=title)
+
+    def tag_slugs(self, post):
+        return set(
+            api_models.PostTag.objects.filter(post=post).values_list(
+                "tag__slug", flat=True
+            )
+        )
+
+    def titles(self, tag_slug):
+        response = self.client.get(f"/api/v1/post/tag/{tag_slug}/")
+        return [post["title"] for post in response.json()["results"]]
+
+    def test_parse_tags(self):
+        self.assertEqual(
+            parse_tags(" Django, django ,REST api,, "),
+            {"django": "Django", "rest-api": "REST api"},
+        )
+        self.assertEqual(parse_tags(None), {})
+
+    def test_create_and_edit_keep_the_index_in_step(self):
+        post = self.create_post("First", "Django, Python")
+        self.assertEqual(self.tag_slugs(post), {"django", "python"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f"/api/v1/author/dashboard/post-detail/{self.author.id}/{post.id}/",
+                {
+                    "title": "First",
+                    "description": "Body",
+                    "tags": "python, Caching",
+                    "category": self.category.id,
+                    "post_status": "Active",
+                    "image": "undefined",
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.tag_slugs(post), {"python", "caching"})
+        self.assertEqual(self.titles("django"), [])
+        self.assertEqual(self.titles("caching"), ["First"])
+
+    def test_tag_pages_and_cloud_count_active_posts_only(self):
+        self.create_post("First", "django, python")
+        self.create_post("Second", "django")
+        self.create_post("Hidden", "django, python", status="Draft")
+
+        self.assertEqual(sorted(self.titles("django")), ["First", "Second"])
+        self.assertEqual(self.titles("unknown"), [])
+
+        cloud = self.client.get("/api/v1/post/tag-cloud/").json()
+        self.assertEqual(
+            [(tag["slug"], tag["post_count"]) for tag in cloud],
+            [("django", 2), ("python", 1)],
+        )
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_buckets.clear()
+        self.client = APIClient()
+        self.author = api_models.User.objects.create(email="author@example.com")
+        self.posts = [
+            api_models.Post.objects.create(
+                user=self.author, title=f"Post {i}", tags="", slug=f"post-{i}"
+            )
+            for i in range(2)
+        ]
+        self.dashboard = "/api/v1/author/dashboard"
+
+    def unread(self):
+        response = self.client.get(
+            f"{self.dashboard}/noti-unread-count/{self.author.id}/"
+        )
+        return response.json()["unread"]
+
+    def mark_seen(self, **data):
+        return self.client.post(
+            f"{self.dashboard}/noti-mark-seen-bulk/",
+            {"user_id": self.author.id, **data},
+            format="json",
+        )
+
+    def test_events_coalesce_until_seen(self):
+        post = self.posts[0]
+        for _ in range(3):
+            notify(self.author.id, post.id, "Like")
+        notify(self.author.id, post.id, "Comment")
+
+        rows = api_models.Notification.objects.filter(user=self.author)
+        self.assertEqual(
+            sorted(rows.values_list("type", "count")), [("Comment", 1), ("Like", 3)]
+        )
+        self.assertEqual(self.unread(), 2)
+
+        self.assertEqual(self.mark_seen(all=True).json()["updated"], 2)
+        self.assertEqual(self.unread(), 0)
+
+        # A seen notification stays put; the next event opens a new one.
+        notify(self.author.id, post.id, "Like")
+        self.assertEqual(rows.count(), 3)
+        self.assertEqual(self.unread(), 1)
+        self.assertEqual(list(find_author_stats_drift()), [])
+
+    def test_bulk_mark_seen(self):
+        for post in self.posts:
+            notify(self.author.id, post.id, "Like")
+        first, second = api_models.Notification.objects.order_by("id")
+
+        response = self.mark_seen(up_to_id=first.id)
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertEqual(self.unread(), 1)
+        self.assertEqual(self.mark_seen(noti_ids=[first.id]).json()["updated"], 0)
+        self.assertEqual(self.mark_seen(noti_ids=[second.id]).json()["updated"], 1)
+        self.assertEqual(self.unread(), 0)
+
+    def test_bulk_mark_seen_rejects_bad_ids(self):
+        for data in [{}, {"up_to_id": "abc"}, {"noti_ids": "1"}, {"noti_ids": ["x"]}]:
+            with self.subTest(data=data):
+                self.assertEqual(self.mark_seen(**data).status_code, 400)
+
+    def test_deleting_a_post_drops_its_unread_notifications(self):
+        for post in self.posts:
+            notify(self.author.id, post.id, "Like")
+            notify(self.author.id, post.id, "Comment")
+        self.mark_seen(noti_ids=[api_models.Notification.objects.order_by("id")[0].id])
+        self.assertEqual(self.unread(), 3)
+
+        post = self.posts[0]
+        response = self.client.delete(
+            f"{self.dashboard}/post-detail/{self.author.id}/{post.id}/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.unread(), 2)
+        self.assertEqual(list(find_author_stats_drift()), [])
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        api_jobs.TASKS["test"] = self.handler
+        self.addCleanup(api_jobs.TASKS.pop, "test")
+
+    def handler(self, fail=False):
+        self.calls.append(fail)
+        if fail:
+            raise RuntimeError("boom")
+
+    def test_a_job_is_claimed_once(self):
+        job = api_jobs.enqueue("test")
+        api_jobs.enqueue("test", delay=60)
+
+        claimed = api_jobs.claim("worker-a")
+        self.assertEqual(claimed.id, job.id)
+        self.assertIsNone(api_jobs.claim("worker-b"))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), ("Running", "worker-a"))
+
+    def test_finished_jobs_are_deleted(self):
+        api_jobs.enqueue("test")
+        self.assertTrue(api_jobs.run(api_jobs.claim("worker")))
+        self.assertEqual(self.calls, [False])
+        self.assertFalse(api_models.Job.objects.exists())
+
+    @override_settings(JOBS_RETRY_BACKOFF=10)
+    def test_failures_retry_with_backoff_then_give_up(self):
+        job = api_jobs.enqueue("test", max_attempts=2, fail=True)
+
+        before = timezone.now()
+        with self.assertLogs("api.jobs", "ERROR"):
+            self.assertFalse(api_jobs.run(api_jobs.claim("worker")))
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.status, job.attempts, job.locked_by), ("Pending", 1, None)
+        )
+        self.assertIn("RuntimeError: boom", job.last_error)
+        delay = (job.run_at - before).total_seconds()
+        self.assertTrue(8 <= delay <= 13, delay)
+        self.assertIsNone(api_jobs.claim("worker"))
+
+        api_models.Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs("api.jobs", "ERROR"):
+            self.assertFalse(api_jobs.run(api_jobs.claim("worker")))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("Failed", 2))
+
+        self.assertEqual(api_jobs.prune_failed(), 0)
+        self.assertEqual(api_jobs.prune_failed(age=0), 1)
+
+    def test_release_stale_requeues_abandoned_jobs(self):
+        stale = api_jobs.enqueue("test")
+        api_jobs.claim("dead-worker")
+        api_models.Job.objects.filter(id=stale.id).update(
+            locked_at=timezone.now() - timedelta(seconds=600)
+        )
+        fresh = api_jobs.enqueue("test")
+        api_jobs.claim("live-worker")
+
+        self.assertEqual(api_jobs.release_stale(timeout=300), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), ("Pending", None))
+        self.assertEqual((fresh.status, fresh.locked_by), ("Running", "live-worker"))
+
+
+class PostSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = api_models.User.objects.create(email="author@example.com")
+        self.post = api_models.Post.objects.create(
+            user=self.user,
+            title="Django tips",
+            description="ORM tricks",
+            tags="python",
+            slug="django-tips",
+        )
+        api_models.Post.objects.create(
+            user=self.user,
+            title="Rust intro",
+            description="Ownership explained",
+            tags="django",
+            slug="rust-intro",
+        )
+        api_models.Post.objects.create(
+            user=self.user,
+            title="Django draft",
+            tags="django",
+            slug="django-draft",
+            status="Draft",
+        )
+
+    def search(self, query):
+        response = self.client.get("/api/v1/post/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranks_title_matches_first_and_skips_inactive_posts(self):
+        data = self.search("django")
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(
+            [post["slug"] for post in data["results"]], ["django-tips", "rust-intro"]
+        )
+
+    def test_prefix_match_on_last_word(self):
+        self.assertEqual(self.search("owner")["count"], 1)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.post.title = "Flask tips"
+        self.post.save()
+        self.assertEqual(self.search("flask")["count"], 1)
+
+        self.post.delete()
+        self.assertEqual(self.search("flask")["count"], 0)
+
+    def test_syntax_characters_are_not_passed_to_fts(self):
+        self.assertEqual(self.search('"(rust* OR'), self.search("rust or"))
+        self.assertEqual(self.search("")["count"], 0)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+class QueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every SELECT each endpoint issues and fails
+    if SQLite would read a whole table instead of seeking an index.
+    """
+
+    # Endpoints that list these tables are expected to read all of them.
+    FULL_SCAN_ALLOWED = {"api_category", "api_tag"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = api_models.User.objects.create(email="author@example.com")
+        cls.reader = api_models.User.objects.create(email="reader@example.com")
+        cls.category = api_models.Category.objects.create(title="News", slug="news")
+        tag = api_models.Tag.objects.create(name="Django", slug="django")
+        for i in range(5):
+            post = api_models.Post.objects.create(
+                user=cls.user,
+                profile=cls.user.profile,
+                category=cls.category,
+                title=f"Post {i}",
+                tags="django",
+                slug=f"post-{i}",
+            )
+            post.likes.add(cls.reader)
+            api_models.PostTag.objects.create(post=post, tag=tag)
+            api_models.Comments.objects.create(post=post, name="r", email="r@e.com")
+            api_models.Bookmark.objects.create(post=post, user=cls.reader)
+            api_models.Notification.objects.create(
+                user=cls.user, post=post, type="Like"
+            )
+        cls.post = post
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        # Walking an index in order is fine when a LIMIT stops it early.
+        limited = " LIMIT " in sql
+        scans = []
+        for line in plan:
+            match = re.fullmatch(r"SCAN (\w+)( USING (COVERING )?INDEX \w+)?", line)
+            if not match or match.group(1) in self.FULL_SCAN_ALLOWED:
+                continue
+            if match.group(2) and limited:
+                continue
+            scans.append(line)
+        return scans
+
+    def assertNoFullScans(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400, url)
+
+        for query in queries.captured_queries:
+            if query["sql"].startswith("SELECT"):
+                scans = self.full_scans(query["sql"])
+                self.assertEqual(scans, [], f"{url}: {query['sql']}")
+
+    def test_public_endpoints(self):
+        for url in [
+            "/api/v1/post/category/list/",
+            "/api/v1/post/list/",
+            "/api/v1/post/category/posts/news/",
+            "/api/v1/post/details/post-0/",
+            "/api/v1/post/search/?q=post",
+            "/api/v1/post/tag/django/",
+            "/api/v1/post/tag-cloud/",
+        ]:
+            with self.subTest(url=url):
+                self.assertNoFullScans("get", url)
+
+    def test_dashboard_endpoints(self):
+        for url in [
+            f"/api/v1/author/dashboard/stats/{self.user.id}/",
+            f"/api/v1/author/dashboard/comment-list/{self.user.id}/",
+            f"/api/v1/author/dashboard/noti-list/{self.user.id}/",
+            f"/api/v1/author/dashboard/post-detail/{self.user.id}/{self.post.id}/",
+        ]:
+            with self.subTest(url=url):
+                self.assertNoFullScans("get", url)
+
+    def query_count(self, url):
+        cache.clear()
+        users.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        urls = [
+            "/api/v1/post/list/",
+            "/api/v1/post/category/posts/news/",
+            "/api/v1/post/tag/django/",
+            f"/api/v1/author/dashboard/comment-list/{self.user.id}/",
+            f"/api/v1/author/dashboard/noti-list/{self.user.id}/",
+            f"/api/v1/author/dashboard/post-detail/{self.user.id}/{self.post.id}/",
+        ]
+        before = {url: self.query_count(url) for url in urls}
+
+        tag = api_models.Tag.objects.get(slug="django")
+        for i in range(5, 10):
+            post = api_models.Post.objects.create(
+                user=self.user,
+                profile=self.user.profile,
+                category=self.category,
+                title=f"Post {i}",
+                tags="django",
+                slug=f"post-{i}",
+            )
+            post.likes.add(self.user, self.reader)
+            self.post.likes.add(
+                api_models.User.objects.create(email=f"fan{i}@example.com")
+            )
+            api_models.PostTag.objects.create(post=post, tag=tag)
+            api_models.Comments.objects.create(post=post, name="r", email="r@e.com")
+            api_models.Notification.objects.create(
+                user=self.user, post=post, type="Comment"
+            )
+
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.query_count(url), before[url])
+
+    def test_write_endpoints(self):
+        body = {"user_id": self.reader.id, "post_id": self.post.id}
+        for url in ["/api/v1/post/like-post/", "/api/v1/post/bookmark-post/"]:
+            with self.subTest(url=url):
+                self.assertNoFullScans("post", url, body)
+
+
+@override_settings(UPLOAD_CHUNK_SIZE=1024, UPLOAD_MAX_SIZE=64 * 1024)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = api_models.User.objects.create(email="author@example.com")
+        self.category = api_models.Category.objects.create(title="News", slug="news")
+
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        dirs = override_settings(CHUNKED_UPLOAD_DIR=f"{tmp}/uploads", MEDIA_ROOT=tmp)
+        dirs.enable()
+        self.addCleanup(dirs.disable)
+
+        if Image is None:
+            self.image = b"\x89PNG\r\n\x1a\n" + bytes(3000)
+        else:
+            buffer = io.BytesIO()
+            Image.effect_noise((64, 64), 50).save(buffer, format="PNG")
+            self.image = buffer.getvalue()
+
+    def start(self, **data):
+        body = {
+            "user_id": self.user.id,
+            "filename": "cover.png",
+            "content_type": "image/png",
+            "size": len(self.image),
+            **data,
+        }
+        return self.client.post("/api/v1/author/dashboard/upload/", body)
+
+    def put(self, upload_id, offset, data):
+        return self.client.put(
+            f"/api/v1/author/dashboard/upload/{upload_id}/",
+            data,
+            content_type="application/octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self):
+        upload_id = self.start().json()["upload_id"]
+        for offset in range(0, len(self.image), 1024):
+            response = self.put(upload_id, offset, self.image[offset : offset + 1024])
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["complete"])
+        return upload_id
+
+    def test_rejects_oversized_and_unsupported_files_up_front(self):
+        self.assertEqual(self.start(size=65 * 1024).status_code, 413)
+        self.assertEqual(self.start(content_type="text/html").status_code, 415)
+        self.assertEqual(self.start(size="big").status_code, 400)
+        self.assertEqual(self.start(size="").status_code, 400)
+
+    def test_first_chunk_is_checked_against_the_declared_type(self):
+        upload_id = self.start().json()["upload_id"]
+        self.assertEqual(
+            self.put(upload_id, 0, b"<html>" + bytes(1018)).status_code, 415
+        )
+
+    def test_out_of_order_chunk_reports_offset_to_resume_from(self):
+        upload_id = self.start().json()["upload_id"]
+        self.put(upload_id, 0, self.image[:1024])
+
+        response = self.put(upload_id, 2048, self.image[2048:3072])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 1024)
+
+        response = self.client.get(f"/api/v1/author/dashboard/upload/{upload_id}/")
+        self.assertEqual(response.json()["offset"], 1024)
+
+    def test_post_create_accepts_upload_handle(self):
+        upload_id = self.upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/v1/author/dashboard/post-create/,",
+                {
+                    "user_id": self.user.id,
+                    "title": "With cover",
+                    "category": self.category.id,
+                    "post_status": "Active",
+                    "tags": "",
+                    "image_upload": upload_id,
+                },
+            )
+        self.assertEqual(response.status_code, 201)
+
+        post = api_models.Post.objects.get(title="With cover")
+        with post.image.open("rb") as image:
+            self.assertEqual(image.read(), self.image)
+        self.assertFalse(api_models.Upload.objects.exists())
+
+    def test_rolled_back_post_leaves_the_upload_alone(self):
+        upload_id = self.upload()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                upload = api_uploads.claim(upload_id, self.user.id)
+                post = api_models.Post.objects.create(
+                    user=self.user, title="Broken", tags="", slug="broken"
+                )
+                api_uploads.attach(post, "image", upload)
+                raise RuntimeError("save failed")
+
+        self.assertEqual(callbacks, [])
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, "Complete")
+        with open(api_uploads.upload_path(upload), "rb") as handle:
+            self.assertEqual(handle.read(), self.image)
+
+    def test_upload_handle_attaches_to_one_post_only(self):
+        upload_id = self.upload()
+        post = api_models.Post.objects.create(
+            user=self.user, title="Old", tags="", slug="old", category=self.category
+        )
+        body = {
+            "title": "Edited",
+            "category": self.category.id,
+            "post_status": "Active",
+            "tags": "",
+            "image": "undefined",
+            "image_upload": upload_id,
+        }
+        url = f"/api/v1/author/dashboard/post-detail/{self.user.id}/{post.id}/"
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.put(url, body)
+            second = self.client.post(
+                "/api/v1/author/dashboard/post-create/,",
+                {**body, "user_id": self.user.id, "title": "Copy"},
+            )
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.assertFalse(api_models.Post.objects.filter(title="Copy").exists())
+
+        post.refresh_from_db()
+        with post.image.open("rb") as image:
+            self.assertEqual(image.read(), self.image)
+        self.assertFalse(api_models.Upload.objects.exists())
+
+    def test_upload_handle_is_bound_to_its_owner(self):
+        upload_id = self.upload()
+        other = api_models.User.objects.create(email="other@example.com")
+        response = self.client.post(
+            "/api/v1/author/dashboard/post-create/,",
+            {
+                "user_id": other.id,
+                "title": "Stolen",
+                "category": self.category.id,
+                "post_status": "Active",
+                "tags": "",
+                "image_upload": upload_id,
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = api_models.User.objects.create(email="author@example.com")
+        category = api_models.Category.objects.create(title="News", slug="news")
+        for i in range(3):
+            post = api_models.Post.objects.create(
+                user=cls.user,
+                profile=cls.user.profile,
+                category=category,
+                title=f"Post {i}",
+                tags="django",
+                slug=f"post-{i}",
+            )
+            post.likes.add(cls.user)
+            api_models.Notification.objects.create(
+                user=cls.user, post=post, type="Like"
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    async def assertSameAsSync(self, url, ignore=()):
+        sync = (await self.async_client.get(f"/api/v1/{url}")).json()
+        response = await self.async_client.get(f"/api/v1/async/{url}")
+        self.assertEqual(response.status_code, 200, url)
+
+        data = response.json()
+        for key in ignore:
+            sync.pop(key), data.pop(key)
+        self.assertEqual(data, sync, url)
+
+    async def test_matches_sync_views(self):
+        await self.assertSameAsSync("post/category/list/")
+        await self.assertSameAsSync("post/list/?page_size=2", ignore=["next"])
+        await self.assertSameAsSync(f"author/dashboard/noti-list/{self.user.id}/")
+
+    async def test_post_detail_counts_views(self):
+        await self.assertSameAsSync("post/details/post-1/", ignore=["view"])
+        # The second async hit is served from the response cache.
+        await self.async_client.get("/api/v1/async/post/details/post-1/")
+        post = await api_models.Post.objects.aget(slug="post-1")
+        self.assertEqual(post.view, 3)
+
+        response = await self.async_client.get("/api/v1/async/post/details/nope/")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(SimpleTestCase):
+    def route(self, path, method="get", write=False, cookies=None):
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(path)
+        used = []
+
+        def view(request):
+            if write:
+                router.db_for_write(api_models.Post)
+            used.append(router.db_for_read(api_models.Post))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return used[0], response.cookies
+
+    def test_public_reads_go_to_replicas(self):
+        self.assertEqual(self.route("/api/v1/post/list/")[0], "replica")
+        self.assertEqual(self.route("/api/v1/async/post/details/x/")[0], "replica")
+        self.assertEqual(self.route("/api/v1/author/dashboard/stats/1/")[0], "default")
+        self.assertEqual(router.db_for_read(api_models.Post), "default")
+
+    def test_clients_read_their_own_writes(self):
+        db, cookies = self.route("/api/v1/post/list/", write=True)
+        self.assertEqual(db, "default")
+        self.assertIn("db_primary", cookies)
+
+        db, _ = self.route("/api/v1/post/list/", cookies={"db_primary": "1"})
+        self.assertEqual(db, "default")
+        db, _ = self.route("/api/v1/post/like-post/", method="post")
+        self.assertEqual(db, "default")
+
+
+class SQLiteProfileTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_uses_production_pragmas(self):
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("cache_size"), -64 * 1024)
+
+    @override_settings(SQLITE_PRAGMAS={"cache_size": -1024})
+    def test_settings_override_single_pragmas(self):
+        self.assertEqual(pragmas()["cache_size"], -1024)
+        self.assertEqual(pragmas()["busy_timeout"], 5000)
+
+    def test_transactions_hold_the_write_gate(self):
+        # TestCase wraps each test in a transaction on this connection.
+        self.assertIs(connection.gate.holder, connections["default"])
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        users.clear()
+        self.user = api_models.User.objects.create(email="author@example.com")
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def authenticate(self):
+        return CachedJWTAuthentication().authenticate(self.request)[0]
+
+    def test_steady_state_needs_no_queries(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(user.profile.user_id, self.user.id)
+
+    def test_user_and_profile_saves_invalidate(self):
+        self.authenticate()
+        self.user.full_name = "Renamed"
+        self.user.save()
+        self.assertEqual(self.authenticate().full_name, "Renamed")
+
+        self.user.profile.bio = "Hello"
+        self.user.profile.save()
+        self.assertEqual(self.authenticate().profile.bio, "Hello")
+
+    def test_dashboard_requests_authenticate_without_queries(self):
+        url = f"/api/v1/author/dashboard/noti-unread-count/{self.user.id}/"
+        anonymous = APIClient()
+        anonymous.get(url)
+        with CaptureQueriesContext(connection) as baseline:
+            self.assertEqual(anonymous.get(url).status_code, 200)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.request.META["HTTP_AUTHORIZATION"])
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), len(baseline))
+        self.assertEqual(response.renderer_context["request"].user, self.user)
+
+        client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(client.get(url).status_code, 401)
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        blacklisted.clear()
+        self.client = APIClient()
+        self.user = api_models.User.objects.create(email="author@example.com")
+
+    def refresh(self, token):
+        return self.client.post("/api/v1/user/token/refresh/", {"refresh": token})
+
+    def test_rotated_token_cannot_be_replayed(self):
+        token = str(RefreshToken.for_user(self.user))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        # The blacklist check (a join on jti) is skipped; the insert decides.
+        joins = [q["sql"] for q in queries.captured_queries if "INNER JOIN" in q["sql"]]
+        self.assertEqual(joins, [])
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+        # Another process, which never saw the rotation, rejects it too.
+        blacklisted.clear()
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.json()["refresh"]).status_code, 200)
+
+    def test_prunes_expired_tokens_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                jti=f"old-{i}", token="", expires_at=now - timedelta(days=1)
+            )
+            BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(
+            jti="live", token="", expires_at=now + timedelta(days=1)
+        )
+
+        self.assertEqual(prune_expired_tokens(batch_size=2, max_batches=2), (4, True))
+        self.assertEqual(prune_expired_tokens(batch_size=2), (1, False))
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), ["live"]
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class SlowReadCache(LocMemCache):
+    """Widens the gap between a bucket's read and write, to expose races."""
+
+    def get(self, *args, **kwargs):
+        value = super().get(*args, **kwargs)
+        time.sleep(0.001)
+        return value
+
+
+THROTTLE_RATES = {"write_user": "2/min", "write_ip": "4/min"}
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": THROTTLE_RATES}
+)
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        local_buckets.clear()
+        self.client = APIClient()
+        author = api_models.User.objects.create(email="author@example.com")
+        self.post = api_models.Post.objects.create(
+            user=author, title="Post", tags="", slug="post"
+        )
+        self.users = [
+            api_models.User.objects.create(email=f"reader{i}@example.com")
+            for i in range(2)
+        ]
+
+    def bookmark(self, user):
+        return self.client.post(
+            "/api/v1/post/bookmark-post/", {"user_id": user.id, "post_id": self.post.id}
+        )
+
+    def test_limits_each_user_then_each_ip(self):
+        first, second = self.users
+        self.assertEqual(self.bookmark(first).status_code, 201)
+        self.assertEqual(self.bookmark(first).status_code, 200)
+        response = self.bookmark(first)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        # Rejected requests still cost the address a token; a different
+        # account from the same address soon hits the IP bucket.
+        self.assertEqual(self.bookmark(second).status_code, 201)
+        self.assertEqual(self.bookmark(second).status_code, 429)
+
+    @override_settings(
+        CACHES={
+            **settings.CACHES,
+            "throttle": {"BACKEND": "api.tests.SlowReadCache"},
+        }
+    )
+    def test_cache_buckets_never_overspend(self):
+        buckets = CacheBuckets("throttle")
+        # Don't let a slow run give up on the lock and go ahead without it.
+        buckets.LOCK_WAIT = 5
+        start = threading.Barrier(8)
+        allowed = []
+
+        def spend():
+            start.wait()
+            for _ in range(10):
+                allowed.append(buckets.take("shared", 20, 1e-6) == 0)
+
+        threads = [threading.Thread(target=spend) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 20)
+
+    def test_base_throttle_is_abstract(self):
+        with self.assertRaises(TypeError):
+            TokenBucketThrottle()
+
+    def test_check_is_cheap(self):
+        drf_request = Request(
+            APIRequestFactory().post("/", {"user_id": 1}, format="json"),
+            parsers=[JSONParser()],
+        )
+        drf_request.user = AnonymousUser()
+        view = BookmarkPostAPIView()
+        throttles = [UserTokenBucketThrottle(), IPTokenBucketThrottle()]
+
+        rounds = 20000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for throttle in throttles:
+                throttle.allow_request(drf_request, view)
+        per_check = (time.perf_counter() - start) / (rounds * len(throttles))
+        self.assertLess(per_check, 50e-6)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        user = api_models.User.objects.create(email="author@example.com")
+        api_models.Post.objects.create(
+            user=user, title="Post", description="Body", tags="", status="Active"
+        )
+
+    def scrape(self):
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.5"], METRICS_TOKEN="s3cret")
+    def test_scrapes_need_an_allowed_address_or_the_token(self):
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        self.assertEqual(
+            self.client.get("/metrics/", REMOTE_ADDR="10.0.0.5").status_code, 200
+        )
+        for header, code in [("Bearer wrong", 403), ("Bearer s3cret", 200)]:
+            response = self.client.get("/metrics/", HTTP_AUTHORIZATION=header)
+            self.assertEqual(response.status_code, code, header)
+
+    def test_records_requests_per_view(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get("/api/v1/post/list/").status_code, 200)
+        self.client.get("/api/v1/missing/")
+
+        body = self.scrape()
+        labels = 'view="PostListAPIView",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 3', body)
+        self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 3", body)
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3', body
+        )
+        self.assertIn('view="<unresolved>",method="GET",status="404"', body)
+
+        queries = re.search(rf"http_db_queries_total{{{labels}}} (\d+)", body)
+        self.assertGreater(int(queries.group(1)), 0)
+
+    def test_merges_other_worker_processes(self):
+        self.client.get("/api/v1/post/list/")
+        # A process that has exited, and so can't clean up after itself.
+        dead = subprocess.Popen([sys.executable, "-c", ""])
+        dead.wait()
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(METRICS_MULTIPROC_DIR=directory):
+                registry.flush()
+                # Pretend other workers flushed the same stats.
+                own = f"{directory}/{os.getpid()}.json"
+                shutil.copy(own, f"{directory}/{os.getppid()}.json")
+                shutil.copy(own, f"{directory}/{dead.pid}.json")
+                stats = collect()
+                self.assertFalse(os.path.exists(f"{directory}/{dead.pid}.json"))
+
+                registry.discard()
+                self.assertFalse(os.path.exists(own))
+        requests = stats[("PostListAPIView", "GET", "200")][0]
+        self.assertEqual(requests, 2)
+
+
+class SeedBlogTests(TestCase):
+    def test_seeds_consistent_skewed_data(self):
+        call_command(
+            "seed_blog",
+            users=200,
+            posts=40,
+            likes=400,
+            comments=200,
+            bookmarks=200,
+            seed=1,
+            stdout=io.StringIO(),
+        )
+
+        self.assertEqual(api_models.Profile.objects.count(), 200)
+        self.assertEqual(api_models.Post.likes.through.objects.count(), 400)
+        self.assertEqual(api_models.Comments.objects.count(), 200)
+        self.assertFalse(api_models.Job.objects.exists())
+        # Like the app, only likes and comments notify authors.
+        self.assertEqual(
+            set(api_models.Notification.objects.values_list("type", flat=True)),
+            {"Like", "Comment"},
+        )
+        self.assertFalse(list(find_counter_drift()))
+        self.assertFalse(list(find_author_stats_drift()))
+
+        likes = sorted(
+            api_models.Post.objects.values_list("likes_count", flat=True), reverse=True
+        )
+        self.assertGreater(likes[0], 3 * likes[len(likes) // 2])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class EndpointBenchmarkTests(TestCase):
+    def setUp(self):
+        local_buckets.clear()
+        # Buffered post views belong to this test's database.
+        self.addCleanup(view_counter.flush)
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        dirs = override_settings(CHUNKED_UPLOAD_DIR=f"{tmp}/uploads")
+        dirs.enable()
+        self.addCleanup(dirs.disable)
+
+        call_command(
+            "seed_blog",
+            users=60,
+            posts=40,
+            likes=200,
+            comments=100,
+            bookmarks=100,
+            seed=1,
+            stdout=io.StringIO(),
+        )
+
+    def test_covers_every_api_route(self):
+        covered = {
+            resolve(endpoint.path).route
+            for endpoint in benchmarks.endpoints("password")
+        }
+        routes = {f"api/v1/{pattern.pattern}" for pattern in api_urls.urlpatterns}
+        self.assertEqual(covered, routes)
+
+    def test_measures_endpoints(self):
+        results = benchmarks.run(self.client, 2, "password")
+
+        post_list = results["post list"]
+        self.assertGreater(post_list["queries"], 0)
+        self.assertGreater(post_list["bytes"], 0)
+        self.assertLessEqual(post_list["p50_ms"], post_list["p95_ms"])
+
+    def test_compare_flags_regressions(self):
+        before = {"p50_ms": 10, "p95_ms": 20, "queries": 3, "bytes": 1000}
+        limits = benchmarks.thresholds()
+
+        same = {**before, "p95_ms": 22}
+        self.assertEqual(benchmarks.compare({"x": before}, {"x": same}, limits), [])
+
+        worse = {**before, "p95_ms": 40, "queries": 4, "bytes": 2000}
+        regressions = benchmarks.compare({"x": before}, {"x": worse}, limits)
+        self.assertEqual(len(regressions), 3)
@@ -0,0 +1,162 @@
+import abc
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+class LocalBuckets:
+    """
+    Token buckets in a plain dict, without locks: each check is a single
+    dict read and a single dict write, which the GIL keeps atomic. Two
+    threads racing on the same key can both spend the same token; that
+    slack of one request is the price of never blocking.
+    """
+
+    SWEEP_EVERY = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._checks = 0
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        tokens, last, _ = self._buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - last) * rate)
+
+        self._checks += 1
+        if self._checks % self.SWEEP_EVERY == 0:
+            self._sweep(now)
+
+        wait = 0 if tokens >= 1 else (1 - tokens) / rate
+        if not wait:
+            tokens -= 1
+        # Remember when the bucket will be full again, for the sweep.
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        return wait
+
+    def _sweep(self, now):
+        # Refilled buckets are the same as missing ones; drop them.
+        for key, (_, _, full_at) in list(self._buckets.items()):
+            if full_at <= now:
+                self._buckets.pop(key, None)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheBuckets:
+    """
+    Token buckets in a Django cache, shared by every process using it. Each
+    bucket's read-modify-write runs under a short lock taken with
+    cache.add(), which only one caller can win. A caller that can't get the
+    lock within LOCK_WAIT seconds goes ahead without it, so a stuck lock
+    never blocks requests.
+    """
+
+    LOCK_WAIT = 0.05
+    # Seconds before an abandoned lock (a crashed process) expires.
+    LOCK_TIMEOUT = 1
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, capacity, rate):
+        cache = caches[self.alias]
+        key = f"api:throttle:{key}"
+        locked = self._lock(cache, key)
+        try:
+            now = time.time()
+            tokens, last = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            cache.set(key, (tokens, now), math.ceil(capacity / rate))
+            return wait
+        finally:
+            if locked:
+                cache.delete(f"{key}:lock")
+
+    def _lock(self, cache, key):
+        deadline = time.monotonic() + self.LOCK_WAIT
+        while not cache.add(f"{key}:lock", 1, self.LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+local_buckets = LocalBuckets()
+
+
+def buckets():
+    alias = getattr(settings, "THROTTLE_CACHE_ALIAS", None)
+    return CacheBuckets(alias) if alias else local_buckets
+
+
+class TokenBucketThrottle(abc.ABC, BaseThrottle):
+    """
+    Token-bucket throttle for views with a ``throttle_scope``. The rate for
+    "<scope>_<kind>" in DEFAULT_THROTTLE_RATES, e.g. "5/min", sets both the
+    burst size and the refill rate. Scopes without a rate are not limited.
+    """
+
+    kind = None
+
+    @abc.abstractmethod
+    def get_identity(self, request):
+        """The key to limit ``request`` by, or None to let it through."""
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        scope = getattr(view, "throttle_scope", None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}_{self.kind}")
+        if scope is None or rate is None:
+            return True
+
+        identity = self.get_identity(request)
+        if identity is None:
+            return True
+
+        capacity, duration = SimpleRateThrottle.parse_rate(None, rate)
+        key = f"{scope}:{self.kind}:{identity}"
+        self.wait_time = buckets().take(key, capacity, capacity / duration)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = "ip"
+
+    def get_identity(self, request):
+        return self.get_ident(request)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Limits per account: the authenticated user, or else the user_id or
+    email the request acts for (most views here take it in the body).
+    """
+
+    kind = "user"
+
+    def get_identity(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        data = request.data
+        if hasattr(data, "get"):
+            for field in ("user_id", "email"):
+                value = data.get(field)
+                if value:
+                    return f"{field}:{value}"
+        return None
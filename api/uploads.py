@@ -0,0 +1,193 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from api import models as api_models
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow only the leading bytes are checked.
+    Image = None
+
+# Leading bytes of each accepted image type.
+SIGNATURES = {
+    "image/jpeg": [(0, b"\xff\xd8\xff")],
+    "image/png": [(0, b"\x89PNG\r\n\x1a\n")],
+    "image/gif": [(0, b"GIF87a"), (0, b"GIF89a")],
+    "image/webp": [(8, b"WEBP")],
+    "image/avif": [(4, b"ftypavif"), (4, b"ftypavis")],
+}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def chunk_size():
+    return getattr(settings, "UPLOAD_CHUNK_SIZE", 1024 * 1024)
+
+
+def max_size():
+    return getattr(settings, "UPLOAD_MAX_SIZE", 20 * 1024 * 1024)
+
+
+def upload_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, upload.handle)
+
+
+def start(user, filename, content_type, size):
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("File size must be a whole number of bytes", 400)
+    if content_type not in SIGNATURES:
+        raise UploadError(f"Unsupported file type {content_type}", 415)
+    if size <= 0 or size > max_size():
+        raise UploadError(f"File size must be between 1 and {max_size()} bytes", 413)
+
+    upload = api_models.Upload.objects.create(
+        user=user,
+        filename=os.path.basename(filename)[:255] or "upload",
+        content_type=content_type,
+        size=size,
+    )
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    with open(upload_path(upload), "wb") as handle:
+        handle.truncate(size)
+    return upload
+
+
+def _check_signature(upload, head):
+    for offset, magic in SIGNATURES[upload.content_type]:
+        if head[offset : offset + len(magic)] == magic:
+            return
+    raise UploadError(f"File content is not {upload.content_type}", 415)
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Stream one chunk from ``stream`` into the upload at ``offset``. Chunks
+    must arrive in order and be exactly chunk_size() long except the last,
+    so a client can always resume from ``upload.received``.
+    """
+    if upload.status != "Uploading":
+        raise UploadError("Upload is already complete", 409)
+    if offset != upload.received:
+        raise UploadError(f"Expected offset {upload.received}", 409)
+
+    expected = min(chunk_size(), upload.size - offset)
+    if length != expected:
+        raise UploadError(f"Chunk must be {expected} bytes", 400)
+
+    written = 0
+    with open(upload_path(upload), "r+b") as handle:
+        handle.seek(offset)
+        while written < length:
+            data = stream.read(min(64 * 1024, length - written))
+            if not data:
+                break
+            if offset == 0 and written == 0:
+                # Reject the wrong file type on the first bytes, not the last.
+                _check_signature(upload, data)
+            handle.write(data)
+            written += len(data)
+
+    if written != length:
+        raise UploadError("Chunk was shorter than its Content-Length", 400)
+
+    received = offset + length
+    status = "Complete" if received == upload.size else "Uploading"
+    if status == "Complete":
+        _verify(upload)
+    claimed = api_models.Upload.objects.filter(
+        id=upload.id, received=offset, status="Uploading"
+    ).update(received=received, status=status)
+    if not claimed:
+        # Another request wrote the same chunk first; its bytes are identical.
+        upload.refresh_from_db()
+        raise UploadError(f"Expected offset {upload.received}", 409)
+
+    upload.received, upload.status = received, status
+    return upload
+
+
+def _verify(upload):
+    if Image is None:
+        return
+    try:
+        with Image.open(upload_path(upload)) as image:
+            image.verify()
+    except Exception:
+        discard(upload)
+        raise UploadError("File is not a readable image", 415)
+
+
+def discard(upload):
+    try:
+        os.remove(upload_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+class CompletedUpload(File):
+    """
+    A finished upload handed to a FileField. Exposing temporary_file_path()
+    lets FileSystemStorage move the file into place instead of copying it.
+    """
+
+    def __init__(self, upload):
+        self.path = upload_path(upload)
+        super().__init__(open(self.path, "rb"), name=upload.filename)
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def claim(handle, user_id):
+    """
+    Take a completed upload for use as a post image, or raise UploadError.
+    Call it inside the transaction that attaches the upload: only one
+    request can claim a handle, and a rollback hands it back.
+    """
+    claimed = api_models.Upload.objects.filter(
+        handle=handle, user_id=user_id, status="Complete"
+    ).update(status="Claimed")
+    if not claimed:
+        raise UploadError("Unknown, incomplete or already used upload", 400)
+    return api_models.Upload.objects.get(handle=handle)
+
+
+def attach(instance, field_name, upload):
+    """
+    Move a claimed upload into ``instance``'s file field and drop the record
+    once the current transaction commits. On rollback the upload is left
+    as it was, so the client can retry with the same handle.
+    """
+
+    def move():
+        field_file = getattr(instance, field_name)
+        content = CompletedUpload(upload)
+        try:
+            field_file.save(upload.filename, content, save=False)
+        finally:
+            content.close()
+        instance.save(update_fields=[field_name])
+        upload.delete()
+
+    transaction.on_commit(move)
+
+
+def purge_stale(hours=24):
+    cutoff = timezone.now() - timedelta(hours=hours)
+    stale = list(api_models.Upload.objects.filter(date__lt=cutoff))
+    for upload in stale:
+        discard(upload)
+    return len(stale)
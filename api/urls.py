@@ -1,6 +1,7 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from api import views as api_views
+from api import async_views
 
 urlpatterns = [
     path("user/token/", api_views.MyTokenObtainPairView.as_view()),
@@ -14,10 +15,21 @@ urlpatterns = [
         api_views.PostCategoryListAPIView.as_view(),
     ),
     path("post/list/", api_views.PostListAPIView.as_view()),
+    path("post/search/", api_views.PostSearchAPIView.as_view()),
+    path("post/tag/<tag_slug>/", api_views.PostTagListAPIView.as_view()),
+    path("post/tag-cloud/", api_views.TagCloudAPIView.as_view()),
     path("post/details/<slug>/", api_views.PostDetailAPIView.as_view()),
     path("post/like-post/", api_views.LikePostAPIView.as_view()),
     path("post/comment-post/", api_views.PostCommentAPIView.as_view()),
     path("post/bookmark-post/", api_views.BookmarkPostAPIView.as_view()),
+    # Native async versions of the hot read endpoints, for ASGI deployments
+    path("async/post/category/list/", async_views.AsyncCategoryListView.as_view()),
+    path("async/post/list/", async_views.AsyncPostListView.as_view()),
+    path("async/post/details/<slug>/", async_views.AsyncPostDetailView.as_view()),
+    path(
+        "async/author/dashboard/noti-list/<user_id>/",
+        async_views.AsyncNotificationListView.as_view(),
+    ),
     # Dashboard
     path("author/dashboard/stats/<user_id>/", api_views.DashboardStats.as_view()),
     path(
@@ -36,6 +48,22 @@ urlpatterns = [
         "author/dashboard/noti-mark-seen/",
         api_views.DashboardMarkNotificationAsSeen.as_view(),
     ),
+    path(
+        "author/dashboard/noti-mark-seen-bulk/",
+        api_views.DashboardBulkMarkNotificationsAsSeen.as_view(),
+    ),
+    path(
+        "author/dashboard/noti-unread-count/<user_id>/",
+        api_views.DashboardUnreadNotificationCount.as_view(),
+    ),
+    path(
+        "author/dashboard/upload/",
+        api_views.DashboardUploadStartAPIView.as_view(),
+    ),
+    path(
+        "author/dashboard/upload/<upload_id>/",
+        api_views.DashboardUploadChunkAPIView.as_view(),
+    ),
     path(
         "author/dashboard/post-create/,", api_views.DashboardPostCreateAPIView.as_view()
     ),
@@ -0,0 +1,110 @@
+import atexit
+import threading
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+from api import models as api_models
+from api.cache import bump_tags
+from api.counters import adjust_author_stats
+
+
+class ViewCountBuffer:
+    """
+    Collects post view increments in memory and writes them out in batches,
+    one `UPDATE ... SET view = view + n` per post, instead of saving the
+    whole Post row on every read.
+    """
+
+    def __init__(self, interval=None):
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = Counter()
+        self._in_flight = Counter()
+        self._timer = None
+
+    @property
+    def interval(self):
+        if self._interval is not None:
+            return self._interval
+        return getattr(settings, "VIEW_COUNT_FLUSH_INTERVAL", 5)
+
+    def record(self, post_id, count=1):
+        if self.interval <= 0:
+            self._apply({post_id: count})
+            return
+
+        with self._lock:
+            self._pending[post_id] += count
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    async def arecord(self, post_id, count=1):
+        if self.interval <= 0:
+            await sync_to_async(self._apply)({post_id: count})
+        else:
+            self.record(post_id, count)
+
+    def pending(self, post_id):
+        with self._lock:
+            return self._pending[post_id] + self._in_flight[post_id]
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+                self._in_flight = batch
+                self._timer = None
+
+            if not batch:
+                return {}
+
+            try:
+                self._apply(batch)
+            except Exception:
+                with self._lock:
+                    self._pending.update(batch)
+                raise
+            finally:
+                with self._lock:
+                    self._in_flight = Counter()
+
+            return dict(batch)
+
+    def _apply(self, batch):
+        authors = Counter()
+        slugs = []
+        for post_id, user_id, slug in api_models.Post.objects.filter(
+            id__in=list(batch)
+        ).values_list("id", "user_id", "slug"):
+            authors[user_id] += batch[post_id]
+            slugs.append(slug)
+
+        with transaction.atomic():
+            for post_id, count in batch.items():
+                api_models.Post.objects.filter(id=post_id).update(
+                    view=F("view") + count
+                )
+            for user_id, count in authors.items():
+                adjust_author_stats(user_id, views=count)
+            # Only the detail pages: flushing every few seconds would
+            # otherwise empty the cached lists, which may show view counts
+            # up to their timeout old.
+            bump_tags(*(f"post:{slug}" for slug in slugs))
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own connection; don't leak it.
+            connections.close_all()
+
+
+view_counter = ViewCountBuffer()
+atexit.register(view_counter.flush)
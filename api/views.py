@@ -6,7 +6,8 @@ from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
 
 # Restframework
 from rest_framework import status
@@ -14,7 +15,7 @@ from rest_framework.decorators import api_view, APIView
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework import generics
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.authentication import SessionAuthentication
@@ -31,10 +32,28 @@ import random
 # Custom Imports
 from api import serializer as api_serializer
 from api import models as api_models
+from api import pagination as api_pagination
+from api import cache as api_cache
+from api.view_buffer import view_counter
+from api.query_plan import QueryPlanMixin, plan_queryset
+from api import search as api_search
+from api.tags import sync_post_tags
+from api.notifications import mark_seen, unread_count
+from api import jobs as api_jobs
+from api import uploads as api_uploads
+from api.authentication import CachedJWTAuthentication, cached_user
+from api.throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
+from api.counters import (
+    adjust_author_stats,
+    adjust_post_counter,
+    recompute_author_stats,
+)
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = api_serializer.MyTokenObtainPairSerializer
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = "login"
 
 
 class RegisterView(generics.CreateAPIView):
@@ -42,12 +61,14 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = api_serializer.RegisterSerializer
     authentication_classes = [SessionAuthentication]
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = "register"
 
 
 class ProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [AllowAny]
     serializer_class = api_serializer.ProfileSerializer
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
 
     def get_object(self):
         user_id = self.kwargs["user_id"]
@@ -56,19 +77,28 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         return profile
 
 
-class CategoryListAPIView(generics.ListAPIView):
+class CategoryListAPIView(api_cache.CachedResponseMixin, generics.ListAPIView):
     serializer_class = api_serializer.CategorySerializer
     permission_classes = [AllowAny]
     authentication_classes = [SessionAuthentication]
+    replica_reads = True
+    cache_tags = ["categories"]
 
     def get_queryset(self):
-        return api_models.Category.objects.all()
+        return api_cache.category_list()
 
 
-class PostCategoryListAPIView(generics.ListAPIView):
-    serializer_class = api_serializer.PostSerializer
+class PostCategoryListAPIView(
+    api_cache.CachedResponseMixin, QueryPlanMixin, generics.ListAPIView
+):
+    serializer_class = api_serializer.PostReadSerializer
     permission_classes = [AllowAny]
     authentication_classes = [SessionAuthentication]
+    replica_reads = True
+    pagination_class = api_pagination.PostCursorPagination
+
+    def get_cache_tags(self):
+        return ["post-pages", f"category:{self.kwargs['category_slug']}"]
 
     def get_queryset(self):
         category_slug = self.kwargs["category_slug"]
@@ -77,31 +107,109 @@ class PostCategoryListAPIView(generics.ListAPIView):
         return posts
 
 
-class PostListAPIView(generics.ListAPIView):
-    serializer_class = api_serializer.PostSerializer
+class PostListAPIView(
+    api_cache.CachedResponseMixin, QueryPlanMixin, generics.ListAPIView
+):
+    serializer_class = api_serializer.PostReadSerializer
     permission_classes = [AllowAny]
     authentication_classes = [SessionAuthentication]
+    replica_reads = True
+    pagination_class = api_pagination.PostCursorPagination
+    cache_tags = ["post-pages", "posts"]
 
     def get_queryset(self):
         return api_models.Post.objects.all()
 
 
-class PostDetailAPIView(generics.RetrieveAPIView):
-    serializer_class = api_serializer.PostSerializer
+class PostTagListAPIView(
+    api_cache.CachedResponseMixin, QueryPlanMixin, generics.ListAPIView
+):
+    serializer_class = api_serializer.PostReadSerializer
+    permission_classes = [AllowAny]
+    authentication_classes = [SessionAuthentication]
+    replica_reads = True
+    pagination_class = api_pagination.PostCursorPagination
+    cache_tags = ["post-pages", "posts"]
+
+    def get_queryset(self):
+        tag_slug = self.kwargs["tag_slug"]
+        return api_models.Post.objects.filter(
+            posttag__tag__slug=tag_slug, status="Active"
+        )
+
+
+class TagCloudAPIView(api_cache.CachedResponseMixin, generics.ListAPIView):
+    serializer_class = api_serializer.TagSerializer
+    permission_classes = [AllowAny]
+    authentication_classes = [SessionAuthentication]
+    replica_reads = True
+    cache_tags = ["posts"]
+
+    def get_queryset(self):
+        return (
+            api_models.Tag.objects.annotate(
+                post_count=Count("posttag", filter=Q(posttag__post__status="Active"))
+            )
+            .filter(post_count__gt=0)
+            .order_by("-post_count", "name")[:100]
+        )
+
+
+class PostSearchAPIView(generics.ListAPIView):
+    serializer_class = api_serializer.PostReadSerializer
+    permission_classes = [AllowAny]
+    authentication_classes = [SessionAuthentication]
+    replica_reads = True
+    pagination_class = api_pagination.SearchPagination
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        posts = plan_queryset(api_models.Post.objects.all(), self.get_serializer())
+        return api_search.PostSearchResults(self.request.query_params.get("q"), posts)
+
+
+class PostDetailAPIView(
+    api_cache.CachedResponseMixin, QueryPlanMixin, generics.RetrieveAPIView
+):
+    serializer_class = api_serializer.PostReadSerializer
     permission_classes = [AllowAny]
     authentication_classes = [SessionAuthentication]
+    replica_reads = True
+
+    def get_cache_tags(self):
+        return ["post-pages", f"post:{self.kwargs['slug']}"]
+
+    def to_cache_data(self, data):
+        # Cache the persisted count; pending views are added back on each hit.
+        data = dict(data)
+        data["view"] -= view_counter.pending(data["id"])
+        return data
+
+    def from_cache_data(self, data):
+        view_counter.record(data["id"])
+        data["view"] += view_counter.pending(data["id"])
+        return data
 
     def get_object(self):
         slug = self.kwargs["slug"]
-        print(f"Received slug: {slug}")
-        post = api_models.Post.objects.get(slug=slug, status="Active")
-        post.view += 1
-        post.save()
+        posts = self.filter_queryset(api_models.Post.objects.all())
+        post = posts.get(slug=slug, status="Active")
+        view_counter.record(post.id)
+        post.view += view_counter.pending(post.id)
         return post
 
 
 class LikePostAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = "write"
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -116,24 +224,41 @@ class LikePostAPIView(APIView):
         user_id = request.data["user_id"]
         post_id = request.data["post_id"]
 
-        user = api_models.User.objects.get(id=user_id)
+        user = cached_user(user_id)
         post = api_models.Post.objects.get(id=post_id)
-
-        if user in post.likes.all():
-            post.likes.remove(user)
+        likes = api_models.Post.likes.through.objects
+
+        # Counters move by the rows actually changed, so concurrent toggles
+        # of the same like can't count twice. Going through the through
+        # table skips m2m_changed, so invalidate cached pages here.
+        with transaction.atomic():
+            removed, _ = likes.filter(post_id=post.id, user_id=user.id).delete()
+            if removed:
+                adjust_post_counter(post.id, "likes_count", -removed)
+                adjust_author_stats(post.user_id, likes=-removed)
+                api_cache.invalidate_posts([post])
+        if removed:
             return Response({"message": "Post Disliked"}, status=status.HTTP_200_OK)
-        else:
-            post.likes.add(user)
 
-            api_models.Notification.objects.create(
-                user=post.user, post=post, type="Like"
-            )
-            return Response({"message": "Post Liked"}, status=status.HTTP_201_CREATED)
+        try:
+            with transaction.atomic():
+                likes.create(post_id=post.id, user_id=user.id)
+                adjust_post_counter(post.id, "likes_count", 1)
+                adjust_author_stats(post.user_id, likes=1)
+                api_cache.invalidate_posts([post])
+        except IntegrityError:
+            # A concurrent request added the same like first.
+            return Response({"message": "Post Liked"}, status=status.HTTP_200_OK)
+
+        api_jobs.enqueue("notify", user_id=post.user_id, post_id=post.id, type="Like")
+        return Response({"message": "Post Liked"}, status=status.HTTP_201_CREATED)
 
 
 class PostCommentAPIView(APIView):
 
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = "write"
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -154,12 +279,14 @@ class PostCommentAPIView(APIView):
 
         post = api_models.Post.objects.get(id=post_id)
 
-        api_models.Comments.objects.create(
-            post=post, name=name, email=email, comment=comment
-        )
+        with transaction.atomic():
+            api_models.Comments.objects.create(
+                post=post, name=name, email=email, comment=comment
+            )
+            adjust_post_counter(post.id, "comments_count", 1)
 
-        api_models.Notification.objects.create(
-            user=post.user, post=post, type="Comment"
+        api_jobs.enqueue(
+            "notify", user_id=post.user_id, post_id=post.id, type="Comment"
         )
 
         return Response({"message": "Comment Sent"}, status=status.HTTP_201_CREATED)
@@ -167,7 +294,9 @@ class PostCommentAPIView(APIView):
 
 class BookmarkPostAPIView(APIView):
 
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = "write"
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -182,16 +311,27 @@ class BookmarkPostAPIView(APIView):
         user_id = request.data["user_id"]
         post_id = request.data["post_id"]
 
-        user = api_models.User.objects.get(id=user_id)
+        user = cached_user(user_id)
         post = api_models.Post.objects.get(id=post_id)
 
-        bookmark = api_models.Bookmark.objects.filter(post=post, user=user).first()
-
-        if bookmark:
-            bookmark.delete()
+        with transaction.atomic():
+            removed, _ = api_models.Bookmark.objects.filter(
+                post=post, user=user
+            ).delete()
+            if removed:
+                adjust_post_counter(post.id, "bookmarks_count", -removed)
+                adjust_author_stats(post.user_id, bookmarks=-removed)
+        if removed:
             return Response({"message": "Bookmark Removed"}, status=status.HTTP_200_OK)
         else:
-            api_models.Bookmark.objects.create(user=user, post=post, type="Bookmark")
+            try:
+                with transaction.atomic():
+                    api_models.Bookmark.objects.create(user=user, post=post)
+                    adjust_post_counter(post.id, "bookmarks_count", 1)
+                    adjust_author_stats(post.user_id, bookmarks=1)
+            except IntegrityError:
+                # A concurrent request added the same bookmark first.
+                pass
             return Response(
                 {"message": "Bookmark Added"}, status=status.HTTP_201_CREATED
             )
@@ -200,29 +340,18 @@ class BookmarkPostAPIView(APIView):
 class DashboardStats(generics.ListAPIView):
     serializer_class = api_serializer.AuthorSerializer
     permission_classes = [AllowAny]
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
 
     def get_queryset(self):
         user_id = self.kwargs["user_id"]
-        user = api_models.User.objects.get(id=user_id)
 
-        views = api_models.Post.objects.filter(user=user).aggregate(view=Sum("view"))[
-            "view"
-        ]
-        posts = api_models.Post.objects.filter(user=user).count()
-        likes = api_models.Post.objects.filter(user=user).aggregate(
-            total_likes=Sum("likes")
-        )["total_likes"]
-        bookmarks = api_models.Bookmark.objects.filter(post__user=user).count()
+        stats = api_models.AuthorStats.objects.filter(user_id=user_id).first()
+        if stats is None:
+            user = cached_user(user_id)
+            recompute_author_stats([user.id])
+            stats = api_models.AuthorStats.objects.get(user=user)
 
-        return [
-            {
-                "views": views,
-                "posts": posts,
-                "likes": likes,
-                "bookmarks": bookmarks,
-            }
-        ]
+        return [stats]
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -230,58 +359,116 @@ class DashboardStats(generics.ListAPIView):
         return Response(serializer.data)
 
 
-class DashboardPostLists(generics.ListAPIView):
-    serializer_class = api_serializer.PostSerializer
+class DashboardPostLists(QueryPlanMixin, generics.ListAPIView):
+    serializer_class = api_serializer.PostReadSerializer
     permission_classes = [AllowAny]
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
 
     def get_queryset(self):
         user_id = self.kwargs["user_id"]
-        user = api_models.User.objects.get(id=user_id)
+        user = cached_user(user_id)
         return api_models.Post.objects.filter(user=user).order_by("-id")
 
 
-class DashboardCommentLists(generics.ListAPIView):
-    serializer_class = api_serializer.CommentSerializer
+class DashboardCommentLists(QueryPlanMixin, generics.ListAPIView):
+    serializer_class = api_serializer.CommentReadSerializer
     permission_classes = [AllowAny]
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
 
     def get_queryset(self):
         user_id = self.kwargs["user_id"]
-        user = api_models.User.objects.get(id=user_id)
+        user = cached_user(user_id)
         return api_models.Comments.objects.filter(post__user=user)
 
 
-class DashboardNotificationLists(generics.ListAPIView):
-    serializer_class = api_serializer.NotificationSerializer
+class DashboardNotificationLists(QueryPlanMixin, generics.ListAPIView):
+    serializer_class = api_serializer.NotificationReadSerializer
     permission_classes = [AllowAny]
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
 
     def get_queryset(self):
         user_id = self.kwargs["user_id"]
-        user = api_models.User.objects.get(id=user_id)
+        user = cached_user(user_id)
         return api_models.Notification.objects.filter(seen=False, user=user)
 
 
 class DashboardMarkNotificationAsSeen(APIView):
 
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
 
     def post(self, request):
         noti_id = request.data["noti_id"]
-        notification = api_models.Notification.objects.get(id=noti_id)
+        notification = api_models.Notification.objects.only("user_id").get(id=noti_id)
 
-        notification.seen = True
-        notification.save()
+        mark_seen(notification.user_id, ids=[noti_id])
 
         return Response(
             {"message": "Notification marked as seen"}, status=status.HTTP_200_OK
         )
 
 
+class DashboardBulkMarkNotificationsAsSeen(APIView):
+
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "user_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "noti_ids": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                ),
+                "up_to_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "all": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            },
+        ),
+    )
+    def post(self, request):
+        user_id = request.data["user_id"]
+        noti_ids = request.data.get("noti_ids")
+        up_to_id = request.data.get("up_to_id")
+
+        if noti_ids is None and up_to_id is None and not request.data.get("all"):
+            return Response(
+                {"message": "Send noti_ids, up_to_id or all"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            if noti_ids is not None:
+                if not isinstance(noti_ids, list):
+                    raise TypeError
+                noti_ids = [int(noti_id) for noti_id in noti_ids]
+            if up_to_id is not None:
+                up_to_id = int(up_to_id)
+        except (TypeError, ValueError):
+            return Response(
+                {"message": "noti_ids and up_to_id must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        updated = mark_seen(user_id, ids=noti_ids, up_to_id=up_to_id)
+
+        return Response(
+            {"message": "Notifications marked as seen", "updated": updated},
+            status=status.HTTP_200_OK,
+        )
+
+
+class DashboardUnreadNotificationCount(APIView):
+
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request, user_id):
+        return Response({"unread": unread_count(user_id)}, status=status.HTTP_200_OK)
+
+
 class DashboardReplyCommentAPIView(APIView):
 
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
 
     def post(self, request):
         comment_id = request.data["comment_id"]
@@ -296,14 +483,95 @@ class DashboardReplyCommentAPIView(APIView):
         )
 
 
+class DashboardUploadStartAPIView(APIView):
+
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "user_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                "filename": openapi.Schema(type=openapi.TYPE_STRING),
+                "content_type": openapi.Schema(type=openapi.TYPE_STRING),
+                "size": openapi.Schema(type=openapi.TYPE_INTEGER),
+            },
+        ),
+    )
+    def post(self, request):
+        user = cached_user(request.data["user_id"])
+        try:
+            upload = api_uploads.start(
+                user,
+                request.data.get("filename", ""),
+                request.data.get("content_type", ""),
+                request.data.get("size"),
+            )
+        except api_uploads.UploadError as e:
+            return Response({"message": e.message}, status=e.status)
+
+        return Response(
+            {
+                "upload_id": upload.handle,
+                "chunk_size": api_uploads.chunk_size(),
+                "offset": upload.received,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class DashboardUploadChunkAPIView(APIView):
+    """
+    PUT the raw bytes of one chunk, with its position in the Upload-Offset
+    header. GET reports the offset to resume from after a dropped connection.
+    """
+
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    def progress(self, upload, status_code=status.HTTP_200_OK):
+        return Response(
+            {
+                "upload_id": upload.handle,
+                "offset": upload.received,
+                "size": upload.size,
+                "complete": upload.status == "Complete",
+            },
+            status=status_code,
+        )
+
+    def get(self, request, upload_id):
+        upload = api_models.Upload.objects.get(handle=upload_id)
+        return self.progress(upload)
+
+    def put(self, request, upload_id):
+        upload = api_models.Upload.objects.get(handle=upload_id)
+        try:
+            offset = int(request.headers.get("Upload-Offset", -1))
+            length = int(request.headers.get("Content-Length") or 0)
+            # Read the body straight off the socket; request.data would
+            # buffer the whole chunk in memory first.
+            api_uploads.write_chunk(upload, offset, request.stream, length)
+        except api_uploads.UploadError as e:
+            return Response(
+                {"message": e.message, "offset": upload.received}, status=e.status
+            )
+        except ValueError:
+            return Response(
+                {"message": "Upload-Offset must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return self.progress(upload)
+
+
 class DashboardPostCreateAPIView(generics.CreateAPIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
     serializer_class = api_serializer.PostSerializer
     permission_classes = [AllowAny]
 
     def create(self, request, *args, **kwargs):
-        print(request.data)
-
         user_id = request.data.get("user_id")
         title = request.data.get("title")
         image = request.data.get("image")
@@ -311,36 +579,58 @@ class DashboardPostCreateAPIView(generics.CreateAPIView):
         tags = request.data.get("tags")
         category_id = request.data.get("category")
         post_status = request.data.get("post_status")
+        image_upload = request.data.get("image_upload")
 
-        user = api_models.User.objects.get(id=user_id)
+        user = cached_user(user_id)
         category = api_models.Category.objects.get(id=category_id)
 
-        api_models.Post.objects.create(
-            user=user,
-            title=title,
-            image=image,
-            description=description,
-            tags=tags,
-            category=category,
-            status=post_status,
-        )
+        with transaction.atomic():
+            upload = None
+            if image_upload:
+                try:
+                    upload = api_uploads.claim(image_upload, user.id)
+                except api_uploads.UploadError as e:
+                    return Response({"message": e.message}, status=e.status)
+
+            post = api_models.Post(
+                user=user,
+                title=title,
+                image=image,
+                description=description,
+                tags=tags,
+                category=category,
+                status=post_status,
+            )
+            post.save()
+            sync_post_tags(post)
+            if upload is not None:
+                api_uploads.attach(post, "image", upload)
 
         return Response(
             {"message": "Post created succesfully"}, status=status.HTTP_201_CREATED
         )
 
 
-class DashboardPostEditAPIView(generics.RetrieveUpdateDestroyAPIView):
+class DashboardPostEditAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
 
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [CachedJWTAuthentication, SessionAuthentication]
     serializer_class = api_serializer.PostSerializer
     permission_classes = [AllowAny]
 
     def get_object(self):
         user_id = self.kwargs["user_id"]
         post_id = self.kwargs["post_id"]
-        user = api_models.User.objects.get(id=user_id)
-        return api_models.Post.objects.get(id=post_id, user=user)
+        user = cached_user(user_id)
+        posts = api_models.Post.objects.all()
+        if self.request.method in SAFE_METHODS:
+            # Only reads render the post with its related rows.
+            posts = self.filter_queryset(posts)
+        return posts.get(id=post_id, user=user)
+
+    def get_serializer_class(self):
+        if self.request.method in SAFE_METHODS:
+            return api_serializer.PostReadSerializer
+        return api_serializer.PostSerializer
 
     def update(self, request, *args, **kwargs):
         post_instance = self.get_object()
@@ -351,19 +641,34 @@ class DashboardPostEditAPIView(generics.RetrieveUpdateDestroyAPIView):
         tags = request.data.get("tags")
         category_id = request.data.get("category")
         post_status = request.data.get("post_status")
+        image_upload = request.data.get("image_upload")
 
         category = api_models.Category.objects.get(id=category_id)
 
-        post_instance.title = title
-        if image != "undefined":
-            post_instance.image = image
-        post_instance.description = description
-        post_instance.tags = tags
-        post_instance.Category = category
-        post_instance.status = post_status
-        post_instance.save()
+        with transaction.atomic():
+            upload = None
+            if image_upload:
+                try:
+                    upload = api_uploads.claim(image_upload, post_instance.user_id)
+                except api_uploads.UploadError as e:
+                    return Response({"message": e.message}, status=e.status)
+
+            post_instance.title = title
+            if image != "undefined" and upload is None:
+                post_instance.image = image
+            post_instance.description = description
+            post_instance.tags = tags
+            post_instance.category = category
+            post_instance.status = post_status
+            post_instance.save()
+            sync_post_tags(post_instance)
+            if upload is not None:
+                api_uploads.attach(post_instance, "image", upload)
 
         return Response(
             {"message": "post updated succesfully"}, status=status.HTTP_200_OK
         )
-    
\ No newline at end of file
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
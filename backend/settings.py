@@ -50,7 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "api.routers.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,11 +88,41 @@ WSGI_APPLICATION = "backend.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        # django.db.backends.sqlite3 plus the production profile in api/sqlite.py.
+        "ENGINE": "api.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Reuse connections across requests, checking them before each one.
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# The production SQLite profile runs the PRAGMAs in api.sqlite.DEFAULT_PRAGMAS
+# on every new connection; override or add any of them here.
+SQLITE_PRAGMAS = {}
+# Seconds a writer waits for the in-process write gate before giving up.
+SQLITE_WRITE_GATE_TIMEOUT = 30
+
+# Read replicas for the public list/detail views (see api/routers.py), as
+# comma-separated SQLite paths, e.g. DATABASE_REPLICAS=db-replica.sqlite3.
+# `manage.py sync_sqlite_replicas` copies the primary into each of them.
+DATABASE_REPLICAS = []
+for index, name in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICAS", "").split(","))
+):
+    alias = f"replica{index + 1}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "NAME": f"file:{BASE_DIR / name}?mode=ro",
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["api.routers.ReplicaRouter"]
+
+# After a write, the client reads from the primary for this many seconds.
+REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -141,11 +173,80 @@ MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": {
-        "rest_framework.simplejwt.authentication.JWTAuthentication"
+    # The api views list their own authentication_classes; the ones acting
+    # for a user put CachedJWTAuthentication first, like this default.
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "api.authentication.CachedJWTAuthentication",
+    ],
+    # Token buckets (api/throttling.py) per "<throttle_scope>_<user|ip>":
+    # the count is the burst size, refilled evenly over the period.
+    "DEFAULT_THROTTLE_RATES": {
+        "login_user": "5/min",
+        "login_ip": "20/min",
+        "register_ip": "10/hour",
+        "write_user": "60/min",
+        "write_ip": "300/min",
+    },
+}
+
+# Cache alias to keep throttle buckets in, shared across processes; unset
+# keeps them in each process's memory.
+THROTTLE_CACHE_ALIAS = None
+
+# With several worker processes, each one writes its request metrics here
+# every METRICS_FLUSH_INTERVAL seconds so /metrics/ can report the total.
+# Files are named by PID and removed when a worker exits or is found dead;
+# wipe the directory on every deploy so a reused PID can't inherit them.
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 5
+# Who may scrape /metrics/: these client addresses, or anyone sending
+# "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Endpoint benchmarks (manage.py bench_endpoints) compare against this file
+# and fail when p95 latency, query count or response size grow past the
+# thresholds in api.benchmarks.THRESHOLDS; override any of them here.
+BENCHMARK_BASELINE = BASE_DIR / "benchmarks" / "baseline.json"
+BENCHMARK_THRESHOLDS = {}
+
+# Seconds an authenticated user stays in the in-process user cache.
+AUTH_USER_CACHE_TIMEOUT = 30
+
+# Post views are buffered in memory and flushed in batches every this many
+# seconds (see api/view_buffer.py). Set to 0 to write every view immediately.
+VIEW_COUNT_FLUSH_INTERVAL = 5
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
+# Cache alias and lifetime for the public read endpoints' responses
+# (see api/cache.py). Entries are invalidated by signals on every write.
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Background jobs (see api/jobs.py), processed by `manage.py runworker`.
+# With JOBS_RUN_EAGERLY they run in-process right after the request commits.
+JOBS_RUN_EAGERLY = False
+JOBS_RETRY_BACKOFF = 5
+JOBS_LOCK_TIMEOUT = 300
+# Seconds to keep jobs that ran out of attempts; finished jobs are deleted.
+JOBS_FAILED_RETENTION = 7 * 24 * 3600
+
+# Widths (px) of the thumbnails built for uploaded images, in addition to a
+# full-size copy; each is encoded as WebP, and AVIF where Pillow supports it.
+IMAGE_VARIANT_WIDTHS = [320, 768]
+IMAGE_VARIANT_QUALITY = 80
+
+# Chunked image uploads (see api/uploads.py). Every chunk but the last must be
+# exactly UPLOAD_CHUNK_SIZE bytes; partial files live in CHUNKED_UPLOAD_DIR.
+UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+CHUNKED_UPLOAD_DIR = BASE_DIR / "uploads"
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=50),
@@ -170,8 +271,12 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
+    "TOKEN_REFRESH_SERIALIZER": "api.serializer.TokenRefreshSerializer",
 }
 
+# Most recently blacklisted refresh tokens remembered in memory per process.
+TOKEN_BLACKLIST_CACHE_SIZE = 100000
+
 
 # Custom Admin Settings
 JAZZMIN_SETTINGS = {